@@ -1,18 +1,20 @@
-import requests
 import json
 import argparse
-import os
+import concurrent.futures
+
+import credential_provider
+import http_client
 
 BASE_URL = "https://api.airtable.com/v0"
 CREDENTIALS_FILE = "credentials.json"
+BATCH_SIZE = 10          # Airtable's limit on records per create/update request
+RATE_LIMIT = 5           # Airtable allows 5 requests per second per base
+BATCH_WORKERS = 5        # Chunks in flight at once (still paced by RATE_LIMIT)
+PAGE_SIZE = 100          # Airtable's maximum page size for list requests
 
 def load_api_key():
-    """Loads API key from credentials.json."""
-    if os.path.exists(CREDENTIALS_FILE):
-        with open(CREDENTIALS_FILE, "r") as f:
-            creds = json.load(f)
-        return creds.get("airtable_api_key")
-    return None
+    """Loads API key from credentials.json (cached until the file changes)."""
+    return credential_provider.get_provider().get("airtable_api_key")
 
 def make_request(method, url, params=None, payload=None):
     """Handles API requests to Airtable."""
@@ -21,7 +23,9 @@ def make_request(method, url, params=None, payload=None):
         return {"status": "error", "message": "Missing API key in credentials.json"}
     
     headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-    response = requests.request(method, url, headers=headers, params=params, json=payload)
+    base_id = url[len(BASE_URL):].strip("/").split("/")[0]
+    http_client.rate_limiter(f"airtable:{base_id}", RATE_LIMIT).wait()
+    response = http_client.request(method, url, headers=headers, params=params, json=payload)
     
     try:
         response_json = response.json() if response.text else {}
@@ -33,14 +37,92 @@ def make_request(method, url, params=None, payload=None):
     else:
         return {"status": "error", "message": f"Request failed: {response.status_code}", "response": response_json}
 
+def iter_records(base_id, table_id, fields=None, filter_by_formula=None, view="Grid view", page_size=PAGE_SIZE):
+    """Yields pages of records, following Airtable's offset cursor. Projection and filtering run server-side."""
+    query = {"pageSize": page_size}
+    if view:
+        query["view"] = view
+    if fields:
+        query["fields[]"] = fields
+    if filter_by_formula:
+        query["filterByFormula"] = filter_by_formula
+
+    while True:
+        result = make_request("GET", f"{BASE_URL}/{base_id}/{table_id}", params=query)
+        yield result
+        if result["status"] != "success":
+            return
+        offset = result["response"].get("offset")
+        if not offset:
+            return
+        query["offset"] = offset
+
+def list_records(base_id, table_id, options):
+    """Lists every matching record (or the first max_records), page by page."""
+    records = []
+    max_records = options.get("max_records")
+    fields = options.get("fields") if isinstance(options.get("fields"), list) else None
+    pages = iter_records(
+        base_id, table_id, fields=fields, filter_by_formula=options.get("filter_by_formula"),
+        view=options.get("view", "Grid view"), page_size=min(PAGE_SIZE, max_records or PAGE_SIZE)
+    )
+    for page in pages:
+        if page["status"] != "success":
+            return {**page, "records_fetched": len(records)}
+        records.extend(page["response"].get("records", []))
+        if max_records and len(records) >= max_records:
+            records = records[:max_records]
+            break
+    return {"status": "success", "response": {"records": records}}
+
+def run_batches(method, url, records, extra_payload=None):
+    """Sends records in chunks of BATCH_SIZE, several chunks at once within the rate limit."""
+    chunks = [records[i:i + BATCH_SIZE] for i in range(0, len(records), BATCH_SIZE)]
+    results = [None] * len(chunks)
+    with concurrent.futures.ThreadPoolExecutor(BATCH_WORKERS) as executor:
+        futures = {
+            executor.submit(make_request, method, url, payload={**(extra_payload or {}), "records": chunk}): index
+            for index, chunk in enumerate(chunks)
+        }
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                results[futures[future]] = {"status": "error", "message": f"{type(e).__name__}: {e}"}
+
+    saved, errors = [], []
+    for index, result in enumerate(results):
+        if result["status"] == "success":
+            saved.extend(result["response"].get("records", []))
+        else:
+            errors.append({"chunk": index, "records": chunks[index], "message": result["message"], "response": result.get("response")})
+
+    status = "success" if not errors else ("partial" if saved else "error")
+    result = {"status": status, "records": saved, "count": len(saved)}
+    if errors:
+        result["errors"] = errors
+    return result
+
 def execute_action(action, params):
     """Executes an Airtable API action based on input parameters."""
     base_id, table_id = params.get("input", "").split("/")[:2]
     record_id = params.get("record_id", "")
-    fields = params.get("options", {}).get("fields", {})
+    options = params.get("options", {})
+    fields = options.get("fields", {})
+    records = options.get("records", [])
+    table_url = f"{BASE_URL}/{base_id}/{table_id}"
     
     if action == "list_records":
-        return make_request("GET", f"{BASE_URL}/{base_id}/{table_id}", params={"view": "Grid view"})
+        return list_records(base_id, table_id, options)
+    elif action == "batch_create" and records:
+        return run_batches("POST", table_url, [{"fields": r.get("fields", r)} for r in records], {"typecast": options.get("typecast", False)})
+    elif action == "batch_update" and records:
+        return run_batches("PATCH", table_url, records, {"typecast": options.get("typecast", False)})
+    elif action == "batch_upsert" and records and options.get("fields_to_merge_on"):
+        return run_batches(
+            "PATCH", table_url, [{"fields": r.get("fields", r)} for r in records],
+            {"performUpsert": {"fieldsToMergeOn": options["fields_to_merge_on"]}, "typecast": options.get("typecast", False)}
+        )
     elif action == "fetch_record" and record_id:
         return make_request("GET", f"{BASE_URL}/{base_id}/{table_id}/{record_id}")
     elif action == "update_record" and record_id:
@@ -0,0 +1,154 @@
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import json_store
+
+ARTICLES_DIR = "curator_articles"
+ARTICLES_FILE = "curator_articles.json"  # Old single-file history, imported once when the directory is created
+MANIFEST_FILE = "manifest.json"
+
+
+def published_at(article):
+    """Normalizes an article's RSS (or ISO) "published" value to a UTC ISO timestamp."""
+    value = article.get("published") or ""
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            dt = datetime.fromisoformat(value)
+        except ValueError:
+            dt = datetime.utcnow()
+    if dt.tzinfo:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt.isoformat(timespec="seconds")
+
+
+def _in_range(timestamp, since, until):
+    # until is inclusive at its own precision: "2025-03" covers the whole of March
+    return (not since or timestamp >= since) and (not until or timestamp[:len(until)] <= until)
+
+
+class ArticleStore:
+    """Curated articles in monthly JSONL partitions (YYYY-MM.jsonl).
+
+    manifest.json records each partition's min/max published time and counts, so writes append
+    to the months they touch and queries only open partitions overlapping the requested range.
+    """
+
+    def __init__(self, root=ARTICLES_DIR, import_file=ARTICLES_FILE):
+        self.root = root
+        self.manifest_path = os.path.join(root, MANIFEST_FILE)
+        self.lock_path = os.path.join(root, ".lock")
+        self._thread_lock = threading.Lock()
+        is_new = not os.path.exists(self.manifest_path)
+        os.makedirs(root, exist_ok=True)
+        if is_new:
+            with self._locked(exclusive=True):
+                if not os.path.exists(self.manifest_path):
+                    self._write_manifest({"partitions": {}})
+                    if import_file:
+                        self._import_json(import_file)
+
+    @contextmanager
+    def _locked(self, exclusive):
+        with self._thread_lock, open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    def _read_manifest(self):
+        with open(self.manifest_path, "r") as f:
+            return json.load(f)
+
+    def _write_manifest(self, manifest):
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _partition_path(self, month):
+        return os.path.join(self.root, f"{month}.jsonl")
+
+    def _append(self, articles):
+        """Appends articles to their month partitions and updates the manifest. Caller holds the lock."""
+        by_month = {}
+        for article in articles:
+            article = {**article, "published_at": article.get("published_at") or published_at(article)}
+            by_month.setdefault(article["published_at"][:7], []).append(article)
+
+        manifest = self._read_manifest()
+        for month, month_articles in by_month.items():
+            with open(self._partition_path(month), "a") as f:
+                f.writelines(json.dumps(article) + "\n" for article in month_articles)
+
+            timestamps = [article["published_at"] for article in month_articles]
+            partition = manifest["partitions"].setdefault(
+                month, {"min": min(timestamps), "max": max(timestamps), "count": 0, "used": 0}
+            )
+            partition["min"] = min(partition["min"], *timestamps)
+            partition["max"] = max(partition["max"], *timestamps)
+            partition["count"] += len(month_articles)
+            partition["used"] += sum(1 for article in month_articles if article.get("used"))
+        self._write_manifest(manifest)
+        return len(articles)
+
+    def _import_json(self, path):
+        legacy = json_store.get_store(path, [], indent=2)
+        if not os.path.exists(path) and not os.path.exists(legacy.journal_path):
+            return 0
+        articles = legacy.read()
+        return self._append(articles if isinstance(articles, list) else [])
+
+    def add_many(self, articles):
+        """Stores articles, touching only the partitions for their months."""
+        with self._locked(exclusive=True):
+            return self._append(articles)
+
+    def manifest(self):
+        with self._locked(exclusive=False):
+            return self._read_manifest()
+
+    def query(self, since=None, until=None, used=None, limit=None, offset=0):
+        """Returns articles published in [since, until], newest first, optionally filtered by "used"."""
+        results = []
+        with self._locked(exclusive=False):
+            partitions = self._read_manifest()["partitions"]
+            for month in sorted(partitions, reverse=True):
+                partition = partitions[month]
+                if since and partition["max"] < since or until and partition["min"][:len(until)] > until:
+                    continue
+                if used is True and not partition["used"] or used is False and partition["used"] == partition["count"]:
+                    continue
+
+                with open(self._partition_path(month), "r") as f:
+                    articles = [json.loads(line) for line in f if line.strip()]
+                articles = [
+                    article for article in articles
+                    if _in_range(article["published_at"], since, until)
+                    and (used is None or bool(article.get("used")) == used)
+                ]
+                articles.sort(key=lambda article: article["published_at"], reverse=True)
+
+                if offset >= len(articles):
+                    offset -= len(articles)
+                    continue
+                results.extend(articles[offset:])
+                offset = 0
+                if limit is not None and len(results) >= limit:
+                    return results[:limit]
+        return results
+
+
+_store = None
+
+
+def get_store():
+    """Returns the process-wide article store, creating (and importing into) it on first use."""
+    global _store
+    if _store is None:
+        _store = ArticleStore(os.getenv("CURATOR_ARTICLES_DIR", ARTICLES_DIR))
+    return _store
@@ -0,0 +1,167 @@
+import json
+import logging
+import os
+import threading
+import time
+
+CREDENTIALS_FILE = "credentials.json"
+CHECK_INTERVAL = 1.0         # Seconds between stat checks of credentials.json
+REFRESH_MARGIN = 300         # Refresh OAuth tokens this many seconds before they expire
+DEFAULT_TOKEN_LIFETIME = 3600  # Assumed lifetime when a token endpoint doesn't say
+REFRESH_RETRY = 30           # Seconds before retrying a failed background refresh
+
+
+class _Token:
+    def __init__(self, refresh):
+        self.refresh = refresh
+        self.access_token = None
+        self.expires_at = None
+        self.lock = threading.Lock()
+
+
+class CredentialProvider:
+    """credentials.json loaded once, reloaded when the file changes on disk.
+
+    Also caches API clients built from the credentials (rebuilt after a change) and keeps
+    registered OAuth tokens fresh from a background thread, so requests don't pay for
+    client construction or token refresh.
+    """
+
+    def __init__(self, path=CREDENTIALS_FILE):
+        self.path = path
+        self._lock = threading.RLock()
+        self._signature = None
+        self._checked_at = 0.0
+        self._credentials = {}
+        self.version = 0
+        self._clients = {}
+        self._tokens = {}
+        self._wake = threading.Event()
+        self._refresher = None
+
+    # --- Credentials file ----------------------------------------------------------
+
+    def _signature_now(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _reload_if_changed(self):
+        now = time.monotonic()
+        if self.version and now - self._checked_at < CHECK_INTERVAL:
+            return
+        with self._lock:
+            self._checked_at = now
+            signature = self._signature_now()
+            if self.version and signature == self._signature:
+                return
+            credentials = {}
+            if signature is not None:
+                try:
+                    with open(self.path, "r") as f:
+                        credentials = json.load(f)
+                except json.JSONDecodeError:
+                    logging.error(f"🚨 ERROR: Failed to parse {self.path}. Keeping previous credentials.")
+                    return
+            self._credentials = credentials
+            self._signature = signature
+            self.version += 1
+            # Clients and tokens were built from the old values
+            self._clients.clear()
+            for token in self._tokens.values():
+                token.access_token = token.expires_at = None
+            if self.version > 1:
+                logging.info(f"🔑 Reloaded {self.path}.")
+                self._wake.set()
+
+    def get(self, key, default=None):
+        self._reload_if_changed()
+        return self._credentials.get(key, default)
+
+    # --- Cached clients ------------------------------------------------------------
+
+    def client(self, name, factory):
+        """Returns the cached client called name, building it with factory(provider) if needed."""
+        self._reload_if_changed()
+        with self._lock:
+            entry = self._clients.get(name)
+            if entry is None:
+                entry = self._clients[name] = factory(self)
+            return entry
+
+    # --- OAuth tokens ----------------------------------------------------------------
+
+    def register_token(self, name, refresh):
+        """Registers an OAuth token. refresh() returns (access_token, expires_at epoch or None)."""
+        with self._lock:
+            self._tokens[name] = _Token(refresh)
+        self._start_refresher()
+        self._wake.set()
+
+    def has_token(self, name):
+        return name in self._tokens
+
+    def token(self, name, force_refresh=False):
+        """Returns a valid access token, refreshing in the foreground only if the background thread fell behind."""
+        self._reload_if_changed()
+        token = self._tokens[name]
+        # A credentials reload can clear both fields at any moment, so read them once
+        access_token, expires_at = token.access_token, token.expires_at
+        if force_refresh or access_token is None or expires_at is None or expires_at <= time.time():
+            access_token = self._refresh(name, token, None if force_refresh else time.time())
+        return access_token
+
+    def _refresh(self, name, token, expiring_before=None):
+        """Refreshes the token, unless expiring_before is given and another thread already got one that outlives it.
+
+        Returns the access token to use.
+        """
+        with token.lock:
+            # Callers that queued on the lock reuse the token the first one fetched
+            access_token, expires_at = token.access_token, token.expires_at
+            if expiring_before is not None and access_token is not None and expires_at is not None and expires_at > expiring_before:
+                return access_token
+            access_token, expires_at = token.refresh()
+            token.access_token = access_token
+            token.expires_at = expires_at or time.time() + DEFAULT_TOKEN_LIFETIME
+        logging.info(f"🔑 Refreshed {name} token.")
+        return access_token
+
+    def _start_refresher(self):
+        with self._lock:
+            if self._refresher and self._refresher.is_alive():
+                return
+            self._refresher = threading.Thread(target=self._refresh_loop, daemon=True)
+            self._refresher.start()
+
+    def _refresh_loop(self):
+        while True:
+            self._reload_if_changed()
+            next_due = time.time() + 60
+            for name, token in list(self._tokens.items()):
+                due = (token.expires_at or 0) - REFRESH_MARGIN
+                if due <= time.time():
+                    try:
+                        self._refresh(name, token, time.time() + REFRESH_MARGIN)
+                        due = (token.expires_at or 0) - REFRESH_MARGIN
+                    except Exception as e:
+                        logging.warning(f"⚠️ Background refresh of {name} token failed: {e}")
+                        due = time.time() + REFRESH_RETRY
+                next_due = min(next_due, due)
+            self._wake.wait(max(1.0, next_due - time.time()))
+            self._wake.clear()
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    """Returns the process-wide credential provider."""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = CredentialProvider(os.getenv("ORCHESTRATE_CREDENTIALS_FILE", CREDENTIALS_FILE))
+        return _provider
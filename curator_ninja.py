@@ -1,18 +1,113 @@
+import aiohttp
+import asyncio
 import json
 import feedparser
+import hashlib
 import os
+import random
 import schedule
 import time
 import threading
 import concurrent.futures
 import logging
 from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import article_store
+import json_store
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
 NEWS_SOURCES_FILE = "news_sources.json"
-CURATED_ARTICLES_FILE = "curator_articles.json"
+CURATED_ARTICLES_DIR = article_store.ARTICLES_DIR
+FEED_STATE_FILE = "curator_feed_state.json"  # ETag/Last-Modified, seen GUIDs per feed, hashes of stored links
+
+DEFAULT_NEWS_LIMIT = 100     # Articles returned by get_curated_news unless "limit" is given
+MAX_ENTRIES_PER_FEED = 5      # Top entries considered per feed on each run
+SEEN_GUIDS_PER_FEED = 500     # GUIDs remembered per feed
+TRACKING_PARAMS = {"fbclid", "gclid", "oc"}
+
+# 🔥 Async fetch pipeline limits
+FETCH_CONCURRENCY = 100       # Connections open at once across all hosts
+PER_HOST_LIMIT = 6            # ...and per host
+FEED_TIMEOUT = 20             # Seconds per feed request, including retries' individual attempts
+RUN_TIMEOUT = 300             # Seconds for the whole run; feeds still pending are abandoned
+FETCH_RETRIES = 3
+RETRY_BACKOFF = 1.0           # Seconds; attempt n waits RETRY_BACKOFF * 2**n, jittered
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+PARSE_WORKERS = min(8, os.cpu_count() or 1)
+
+def normalize_link(link):
+    """Canonical form of an article link: lowercase host, no fragment, no tracking parameters."""
+    parts = urlsplit(link.strip())
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    ]
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/") or "/", urlencode(sorted(query)), ""))
+
+def link_hash(link):
+    return hashlib.sha1(normalize_link(link).encode("utf-8")).hexdigest()[:16]
+
+def parse_feed_entries(body):
+    """Parses a feed document into plain entry dicts (runs on the parse pool, off the event loop)."""
+    feed = feedparser.parse(body)
+    return [
+        {
+            "id": entry.get("id") or entry.get("link"),
+            "title": entry.get("title", ""),
+            "link": entry.get("link"),
+            "published": entry.get("published")
+        }
+        for entry in feed.entries[:MAX_ENTRIES_PER_FEED]  # Fetching top 5 per category
+        if entry.get("link")
+    ]
+
+async def fetch_feed(session, parse_pool, url, feed_state):
+    """Conditionally GETs one feed with retries. Returns {"status", "etag", "modified", "entries"}."""
+    headers = {}
+    if feed_state.get("etag"):
+        headers["If-None-Match"] = feed_state["etag"]
+    if feed_state.get("modified"):
+        headers["If-Modified-Since"] = feed_state["modified"]
+
+    for attempt in range(FETCH_RETRIES + 1):
+        try:
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304:
+                    return {"status": 304}
+                response.raise_for_status()
+                body = await response.read()
+                etag, modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+            entries = await asyncio.get_running_loop().run_in_executor(parse_pool, parse_feed_entries, body)
+            return {"status": response.status, "etag": etag, "modified": modified, "entries": entries}
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            retryable = not isinstance(e, aiohttp.ClientResponseError) or e.status in RETRY_STATUSES
+            if not retryable or attempt == FETCH_RETRIES:
+                raise
+            await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5))
+
+async def fetch_feeds(urls, feed_states):
+    """Fetches all feeds over one pooled keep-alive session. Returns [(url, result or exception), ...]."""
+    connector = aiohttp.TCPConnector(limit=FETCH_CONCURRENCY, limit_per_host=PER_HOST_LIMIT, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=FEED_TIMEOUT)
+    with concurrent.futures.ThreadPoolExecutor(PARSE_WORKERS) as parse_pool:
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, auto_decompress=True) as session:
+            tasks = {
+                asyncio.ensure_future(fetch_feed(session, parse_pool, url, feed_states.get(url, {}))): url
+                for url in urls
+            }
+            if not tasks:
+                return []
+            done, pending = await asyncio.wait(tasks, timeout=RUN_TIMEOUT)
+            for task in pending:
+                task.cancel()
+            if pending:
+                logging.warning(f"⚠️ {len(pending)} feeds did not finish within {RUN_TIMEOUT}s.")
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    return [(url, task.exception() or task.result()) for task, url in tasks.items() if task in done]
 
 class CuratorNinja:
     def __init__(self, run_scheduler=False):
@@ -54,70 +149,109 @@ class CuratorNinja:
         thread.start()
         logging.info("✅ Scheduler started. Curator Ninja will run at 6 AM daily.")
 
+    def feed_state_store(self):
+        return json_store.get_store(FEED_STATE_FILE, {"feeds": {}, "link_hashes": []}, indent=2)
+
+    def load_feed_state(self):
+        """Loads per-feed state, seeding the link hashes from already stored articles on first use."""
+        store = self.feed_state_store()
+        if not os.path.exists(FEED_STATE_FILE) and not os.path.exists(store.journal_path):
+            stored = article_store.get_store().query()
+            store.set(["link_hashes"], sorted({link_hash(a["link"]) for a in stored if a.get("link")}))
+        return store.read()
+
     def fetch_news(self):
-        """Fetches AI news from RSS feeds and saves them."""
+        """Fetches new AI news from RSS feeds and saves them. Unchanged feeds and seen articles are skipped."""
         logging.info("📰 Fetching AI news from RSS feeds...")
-        articles = []
-
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future_to_url = {executor.submit(feedparser.parse, url): url for url in self.news_feed_urls}
-
-            for future in concurrent.futures.as_completed(future_to_url):
-                url = future_to_url[future]
-                try:
-                    feed = future.result()
-                    if not feed.entries:
-                        logging.warning(f"⚠️ No entries found for {url}")
-                        continue
-
-                    for entry in feed.entries[:5]:  # Fetching top 5 per category
-                        articles.append({
-                            "title": entry.title,
-                            "link": entry.link,
-                            "published": entry.published if hasattr(entry, 'published') else str(datetime.utcnow())
-                        })
-
-                except Exception as e:
-                    logging.error(f"❌ Error processing RSS feed {url}: {e}")
-
-        self.store_curations(articles)
-        return articles
+        state = self.load_feed_state()
+        feed_states = state.get("feeds", {})
+        seen_links = set(state.get("link_hashes", []))
+        articles, new_hashes, feed_updates = [], [], {}
 
-    def store_curations(self, articles):
-        """Stores curated AI news in JSON file."""
-        logging.info("💾 Saving curated news to JSON file...")
-        try:
-            existing_data = []
-            if os.path.exists(CURATED_ARTICLES_FILE):
-                with open(CURATED_ARTICLES_FILE, "r") as f:
-                    existing_data = json.load(f)
-                    if not isinstance(existing_data, list):
-                        existing_data = []  # Ensure it's a list before extending
+        for url, result in asyncio.run(fetch_feeds(self.news_feed_urls, feed_states)):
+            if isinstance(result, Exception):
+                logging.error(f"❌ Error processing RSS feed {url}: {type(result).__name__}: {result}")
+                continue
+            if result["status"] == 304:
+                logging.info(f"⏭️ Feed unchanged since last run: {url}")
+                continue
+            if not result["entries"]:
+                logging.warning(f"⚠️ No entries found for {url}")
+                continue
+
+            seen_guids = feed_states.get(url, {}).get("seen", [])
+            known_guids = set(seen_guids)
+            new_guids = []
+            for entry in result["entries"]:
+                if entry["id"] in known_guids:
+                    continue
+                new_guids.append(entry["id"])
 
-            existing_data.extend(articles)
+                digest = link_hash(entry["link"])
+                if digest in seen_links:
+                    continue  # Same article already stored, possibly from another feed
+                seen_links.add(digest)
+                new_hashes.append(digest)
+                articles.append({
+                    "title": entry["title"],
+                    "link": entry["link"],
+                    "published": entry["published"] or str(datetime.utcnow())
+                })
 
-            with open(CURATED_ARTICLES_FILE, "w") as f:
-                json.dump(existing_data, f, indent=2)
+            feed_updates[url] = {
+                "etag": result["etag"],
+                "modified": result["modified"],
+                "seen": (new_guids + seen_guids)[:SEEN_GUIDS_PER_FEED]
+            }
 
-            logging.info(f"✅ Saved {len(articles)} articles to {CURATED_ARTICLES_FILE}.")
+        if not articles:
+            logging.info("✅ No new articles since the last run.")
+        elif not self.store_curations(articles):
+            # Keep the old validators and seen GUIDs so the next run fetches these articles again
+            return {"error": f"❌ Failed to save {len(articles)} articles; feed state left unchanged."}
+        self.save_feed_state(feed_updates, new_hashes)
+        return articles
+
+    def save_feed_state(self, feed_updates, new_hashes):
+        """Records validators and seen GUIDs per feed, plus hashes of newly stored links."""
+        store = self.feed_state_store()
+        with store.transaction():
+            for url, feed_state in feed_updates.items():
+                store.set(["feeds", url], feed_state)
+            if new_hashes:
+                store.extend(["link_hashes"], new_hashes)
+
+    def store_curations(self, articles):
+        """Stores curated AI news in monthly partitions. Returns whether the articles were saved."""
+        logging.info("💾 Saving curated news to partitions...")
+        try:
+            article_store.get_store().add_many(articles)
+            logging.info(f"✅ Saved {len(articles)} articles to {CURATED_ARTICLES_DIR}/.")
+            return True
 
         except Exception as e:
-            logging.error(f"❌ Error saving data to {CURATED_ARTICLES_FILE}: {e}")
+            logging.error(f"❌ Error saving data to {CURATED_ARTICLES_DIR}/: {e}")
+            return False
 
-    def get_curated_news(self):
-        """Fetches stored curated news from JSON."""
+    def get_curated_news(self, params=None):
+        """Fetches stored curated news, newest first, by date range, used status and page."""
         logging.info("📥 Fetching stored curated news...")
-        if os.path.exists(CURATED_ARTICLES_FILE):
-            with open(CURATED_ARTICLES_FILE, "r") as f:
-                return json.load(f)
-        return {"error": "⚠️ No curated news available yet."}
+        params = params or {}
+        articles = article_store.get_store().query(
+            since=params.get("since"),
+            until=params.get("until"),
+            used=params.get("used"),
+            limit=params.get("limit", DEFAULT_NEWS_LIMIT),
+            offset=params.get("offset", 0)
+        )
+        return articles if articles else {"error": "⚠️ No curated news found."}
 
     def execute(self, action, params=None):
         """Executes tasks based on action type."""
         if action == "fetch_and_store":
             return self.fetch_news()
         elif action == "get_curated_news":
-            return self.get_curated_news()
+            return self.get_curated_news(params)
         else:
             logging.error(f"❌ Unsupported action: {action}")
             return {"error": f"Unsupported action: {action}"}
@@ -126,7 +260,7 @@ class CuratorNinja:
         """Returns supported actions for Orchestrate."""
         return {
             "fetch_and_store": [],
-            "get_curated_news": []
+            "get_curated_news": ["since", "until", "used", "limit", "offset"]
         }
 
 # Handle external requests
@@ -0,0 +1,133 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DROPBOX_INDEX_DB = "dropbox_index.db"
+
+ENTRY_COLUMNS = ["path_lower", "path_display", "name", "tag", "id", "rev", "size", "content_hash", "server_modified"]
+
+
+class DropboxIndex:
+    """Local SQLite mirror of Dropbox metadata (path, rev, size, content_hash) for the whole tree.
+
+    The list_folder cursor lives in the meta table, so after the first full listing each sync
+    only applies what changed. Temporary links are cached per path and rev.
+    """
+
+    def __init__(self, db_path=DROPBOX_INDEX_DB):
+        self.db_path = db_path
+        self._local = threading.local()
+        conn = self._db()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "path_lower TEXT PRIMARY KEY, path_display TEXT, name TEXT, tag TEXT, id TEXT, rev TEXT, "
+                "size INTEGER, content_hash TEXT, server_modified TEXT, data TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_name ON entries(name COLLATE NOCASE)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS links (path_lower TEXT PRIMARY KEY, rev TEXT, link TEXT, expires_at REAL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def _db(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get_meta(self, key):
+        row = self._db().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def set_meta(self, key, value):
+        conn = self._db()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def apply(self, entries, cursor):
+        """Applies one list_folder page (adds, changes and deletes) and stores its cursor in the same transaction."""
+        conn = self._db()
+        with conn:
+            for entry in entries:
+                path_lower = entry["path_lower"]
+                if entry[".tag"] == "deleted":
+                    # A deleted folder takes everything under it along
+                    conn.execute(
+                        "DELETE FROM entries WHERE path_lower = ? OR substr(path_lower, 1, ?) = ?",
+                        (path_lower, len(path_lower) + 1, path_lower + "/")
+                    )
+                    continue
+                values = {**entry, "tag": entry[".tag"]}
+                conn.execute(
+                    f"INSERT OR REPLACE INTO entries ({', '.join(ENTRY_COLUMNS)}, data) "
+                    f"VALUES ({', '.join('?' * (len(ENTRY_COLUMNS) + 1))})",
+                    [values.get(column) for column in ENTRY_COLUMNS] + [json.dumps(entry)]
+                )
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('cursor', ?)", (cursor,))
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('synced_at', ?)", (str(time.time()),))
+
+    def reset(self):
+        """Forgets everything, e.g. when Dropbox reports the cursor as expired."""
+        conn = self._db()
+        with conn:
+            conn.execute("DELETE FROM entries")
+            conn.execute("DELETE FROM links")
+            conn.execute("DELETE FROM meta")
+
+    def cursor(self):
+        return self.get_meta("cursor")
+
+    def synced_at(self):
+        value = self.get_meta("synced_at")
+        return float(value) if value else None
+
+    def count(self):
+        return self._db().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def get(self, path):
+        """Returns the Dropbox metadata for a path (case-insensitive, like Dropbox), or None."""
+        row = self._db().execute("SELECT data FROM entries WHERE path_lower = ?", (path.lower(),)).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def search(self, query, limit=100):
+        """Files and folders whose name contains every word of query, files first, then newest first."""
+        words = query.lower().split()
+        if not words:
+            return []
+        sql = "SELECT data FROM entries WHERE " + " AND ".join("instr(lower(name), ?) > 0" for _ in words)
+        sql += " ORDER BY tag = 'folder', server_modified DESC LIMIT ?"
+        return [json.loads(row["data"]) for row in self._db().execute(sql, words + [limit]).fetchall()]
+
+    def get_link(self, path, rev):
+        """Returns a cached temporary link for path at rev that is still valid, or None."""
+        row = self._db().execute(
+            "SELECT link FROM links WHERE path_lower = ? AND rev IS ? AND expires_at > ?", (path.lower(), rev, time.time())
+        ).fetchone()
+        return row["link"] if row else None
+
+    def set_link(self, path, rev, link, expires_at):
+        conn = self._db()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO links (path_lower, rev, link, expires_at) VALUES (?, ?, ?, ?)",
+                (path.lower(), rev, link, expires_at)
+            )
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    """Returns the process-wide Dropbox metadata index."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = DropboxIndex(os.getenv("DROPBOX_INDEX_DB", DROPBOX_INDEX_DB))
+        return _index
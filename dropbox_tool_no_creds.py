@@ -1,43 +1,79 @@
 import argparse
+import concurrent.futures
+import hashlib
 import json
+import logging
 import os
-import requests
-
-# 🔥 HARD-CODED DROPBOX CREDENTIALS TO ENSURE FASTAPI SEES THEM
+import threading
+import time
 
+import credential_provider
+import dropbox_index
+import http_client
 
 # Dropbox API Endpoints
 DROPBOX_API_URL = "https://api.dropboxapi.com/2"
 DROPBOX_CONTENT_URL = "https://content.dropboxapi.com/2"
 DROPBOX_OAUTH_URL = "https://api.dropbox.com/oauth2/token"
+DROPBOX_NOTIFY_URL = "https://notify.dropboxapi.com/2"
+
+DOWNLOAD_DIR = "dropbox_downloads"
+HASH_BLOCK_SIZE = 4 * 1024 * 1024     # Dropbox content_hash hashes the file in 4 MB blocks
+READ_CHUNK_SIZE = 1024 * 1024         # Bytes read from the network per iteration when downloading
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024   # Bytes per upload-session append (a multiple of 4 MB)
+SIMPLE_UPLOAD_MAX = UPLOAD_CHUNK_SIZE # Larger files go through an upload session
+TRANSFER_WORKERS = 4                  # Files transferred at once by download_files/upload_files
+PROGRESS_STEP = 10                    # Log progress every 10%
+
+# 🔥 Searches, existence checks and temporary links are answered from a local metadata index
+INDEX_MAX_AGE = 60                    # Seconds before a lookup first pulls changes via list_folder/continue
+LIST_LIMIT = 2000                     # Entries per list_folder page
+LONGPOLL_TIMEOUT = 120                # Seconds each list_folder/longpoll waits for changes
+LINK_CACHE_SECONDS = 3.5 * 3600       # Temporary links last 4 hours; reuse them for 3.5
 
 def get_supported_actions():
     """Returns the list of supported actions and required parameters."""
     return {
         "search_files": ["query"],
-        "download_file": ["path"],
+        "download_file": ["path", "local_path"],
+        "download_files": ["paths", "local_dir"],
+        "upload_file": ["local_path", "dropbox_path", "mode"],
+        "upload_files": ["files", "mode"],
         "generate_temporary_link": ["path"],
+        "file_exists": ["path"],
+        "sync_index": ["full"],
+        "watch_index": [],
         "move_file": ["source_path", "destination_path"]
     }
 
-def refresh_dropbox_token():
-    """Refreshes the Dropbox access token dynamically."""
-    response = requests.post(DROPBOX_OAUTH_URL, data={
+def request_dropbox_token():
+    """Exchanges the refresh token from credentials.json for a new access token and its expiry."""
+    provider = credential_provider.get_provider()
+    response = http_client.post(DROPBOX_OAUTH_URL, data={
         "grant_type": "refresh_token",
-        "refresh_token": DROPBOX_REFRESH_TOKEN
-    }, auth=(DROPBOX_APP_KEY, DROPBOX_APP_SECRET))
+        "refresh_token": provider.get("dropbox_refresh_token")
+    }, auth=(provider.get("dropbox_app_key"), provider.get("dropbox_app_secret")))
 
     if response.status_code == 200:
-        new_token = response.json().get("access_token")
-        global DROPBOX_ACCESS_TOKEN
-        DROPBOX_ACCESS_TOKEN = new_token  # Update in memory
-        return new_token
+        data = response.json()
+        return data.get("access_token"), time.time() + data.get("expires_in", 14400)
     else:
         raise ValueError(f"❌ Failed to refresh Dropbox token: {response.text}")
 
+def dropbox_token_provider():
+    """Credential provider with the Dropbox token registered for background refresh."""
+    provider = credential_provider.get_provider()
+    if not provider.has_token("dropbox"):
+        provider.register_token("dropbox", request_dropbox_token)
+    return provider
+
+def refresh_dropbox_token():
+    """Forces a token refresh (after a 401)."""
+    return dropbox_token_provider().token("dropbox", force_refresh=True)
+
 def get_access_token():
-    """Ensures we always have a valid access token."""
-    return DROPBOX_ACCESS_TOKEN
+    """Returns a valid access token; the provider refreshes it ahead of expiry."""
+    return dropbox_token_provider().token("dropbox")
 
 def make_request(endpoint, method="POST", headers=None, json_payload=None, content_download=False):
     """Helper function to make API requests."""
@@ -46,61 +82,340 @@ def make_request(endpoint, method="POST", headers=None, json_payload=None, conte
     headers["Authorization"] = f"Bearer {get_access_token()}"
     headers["Content-Type"] = "application/json"
 
-    response = requests.post(url, headers=headers, json=json_payload) if method == "POST" else requests.get(url, headers=headers)
+    response = http_client.request(method, url, headers=headers, json=json_payload)
     
     if response.status_code == 401:  # Token expired, refresh and retry
         headers["Authorization"] = f"Bearer {refresh_dropbox_token()}"
-        response = requests.post(url, headers=headers, json=json_payload) if method == "POST" else requests.get(url, headers=headers)
+        response = http_client.request(method, url, headers=headers, json=json_payload)
 
     if response.status_code == 200:
         return response.json() if not content_download else response.content
     return {"status": "error", "message": response.text}
 
-def search_files(query):
-    """Search for files matching the query."""
-    payload = {"query": query}
-    return make_request("files/search_v2", json_payload=payload)
+_sync_lock = threading.Lock()
+_watcher = None
+
+def sync_index(full=False):
+    """Brings the metadata index up to date: a full recursive listing the first time, then only changes."""
+    index = dropbox_index.get_index()
+    with _sync_lock:
+        if full:
+            index.reset()
+        cursor = index.cursor()
+        if cursor:
+            result = make_request("files/list_folder/continue", json_payload={"cursor": cursor})
+            if result.get("status") == "error" and "reset" in result["message"]:
+                # Dropbox invalidated the cursor; start over with a full listing
+                logging.warning("⚠️ Dropbox cursor expired. Rebuilding the metadata index.")
+                index.reset()
+                result = make_request("files/list_folder", json_payload={"path": "", "recursive": True, "limit": LIST_LIMIT})
+        else:
+            result = make_request("files/list_folder", json_payload={"path": "", "recursive": True, "limit": LIST_LIMIT})
+
+        changes = 0
+        while result.get("status") != "error":
+            index.apply(result["entries"], result["cursor"])
+            changes += len(result["entries"])
+            if not result.get("has_more"):
+                return {"status": "success", "changes": changes, "entries": index.count()}
+            result = make_request("files/list_folder/continue", json_payload={"cursor": result["cursor"]})
+        return result
+
+def ensure_index(full_sync=True):
+    """Returns the metadata index, syncing it first if it's stale. Returns None if Dropbox can't be reached.
+
+    With full_sync=False a never-synced index returns None instead of listing the whole tree now.
+    """
+    index = dropbox_index.get_index()
+    synced_at = index.synced_at()
+    if synced_at is None and not full_sync:
+        return None
+    watching = _watcher is not None and _watcher.is_alive()
+    if synced_at is None or (not watching and time.time() - synced_at > INDEX_MAX_AGE):
+        try:
+            result = sync_index()
+        except Exception as e:
+            result = {"status": "error", "message": str(e)}
+        if result["status"] == "error":
+            logging.warning(f"⚠️ Could not sync the Dropbox index ({result['message']}). Using the API directly.")
+            return None
+    return index
+
+def watch_index():
+    """Keeps the index current from a background thread that longpolls Dropbox for changes."""
+    global _watcher
+
+    def run():
+        while True:
+            cursor = dropbox_index.get_index().cursor()
+            try:
+                if not cursor:
+                    if sync_index()["status"] == "error":
+                        time.sleep(30)
+                    continue
+                response = http_client.post(
+                    f"{DROPBOX_NOTIFY_URL}/files/list_folder/longpoll",
+                    json={"cursor": cursor, "timeout": LONGPOLL_TIMEOUT},
+                    timeout=(http_client.CONNECT_TIMEOUT, LONGPOLL_TIMEOUT + 90)
+                )
+                result = response.json() if response.status_code == 200 else {}
+                if result.get("changes") or response.status_code == 400:
+                    # 400 means the cursor is no longer valid; sync_index resets it
+                    sync_index()
+                time.sleep(result.get("backoff", 0) if response.status_code == 200 else 30)
+            except Exception as e:
+                logging.warning(f"⚠️ Dropbox index watcher error: {e}")
+                time.sleep(30)
+
+    with _sync_lock:
+        if _watcher is None or not _watcher.is_alive():
+            _watcher = threading.Thread(target=run, daemon=True)
+            _watcher.start()
+    return {"status": "success", "message": "Watching Dropbox for changes."}
+
+def search_files(query, live=False):
+    """Search for files matching the query, from the metadata index unless live=True."""
+    index = None if live else ensure_index()
+    if index is None:
+        payload = {"query": query}
+        return make_request("files/search_v2", json_payload=payload)
+    # Same shape as files/search_v2
+    matches = [
+        {"match_type": {".tag": "filename"}, "metadata": {".tag": "metadata", "metadata": metadata}}
+        for metadata in index.search(query)
+    ]
+    return {"matches": matches, "has_more": False}
+
+def file_exists(path):
+    """Checks whether a path exists in Dropbox, from the metadata index when possible."""
+    index = ensure_index(full_sync=False)
+    metadata = index.get(path) if index is not None else None
+    if metadata is None:
+        # The index can lag behind by up to INDEX_MAX_AGE, so a miss is confirmed with the API
+        result = make_request("files/get_metadata", json_payload={"path": path})
+        metadata = None if result.get("status") == "error" else result
+    return {"status": "success", "exists": metadata is not None, "metadata": metadata}
+
+class ContentHasher:
+    """Computes Dropbox's content_hash incrementally: SHA-256 over the SHA-256 of each 4 MB block."""
+
+    def __init__(self):
+        self._overall = hashlib.sha256()
+        self._block = hashlib.sha256()
+        self._block_pos = 0
+
+    def update(self, data):
+        view = memoryview(data)
+        while view:
+            take = min(len(view), HASH_BLOCK_SIZE - self._block_pos)
+            self._block.update(view[:take])
+            self._block_pos += take
+            view = view[take:]
+            if self._block_pos == HASH_BLOCK_SIZE:
+                self._overall.update(self._block.digest())
+                self._block = hashlib.sha256()
+                self._block_pos = 0
+
+    def hexdigest(self):
+        overall = self._overall.copy()
+        if self._block_pos:
+            overall.update(self._block.digest())
+        return overall.hexdigest()
+
+class Progress:
+    """Logs a transfer's progress every PROGRESS_STEP percent and forwards it to an optional callback."""
+
+    def __init__(self, label, total, callback=None):
+        self.label = label
+        self.total = total
+        self.done = 0
+        self.callback = callback
+        self._next_step = PROGRESS_STEP
+
+    def advance(self, count):
+        self.done += count
+        percent = 100 * self.done / self.total if self.total else 100
+        if percent >= self._next_step or self.done == self.total:
+            logging.info(f"📦 {self.label}: {percent:.0f}% ({self.done / 1e6:.1f}/{self.total / 1e6:.1f} MB)")
+            self._next_step = (int(percent) // PROGRESS_STEP + 1) * PROGRESS_STEP
+        if self.callback:
+            self.callback(self.label, self.done, self.total)
 
-def download_file(path):
-    """Download a file from Dropbox."""
-    headers = {"Dropbox-API-Arg": json.dumps({"path": path})}
-    return make_request("files/download", headers=headers, content_download=True)
+def content_request(endpoint, arg, data=None, stream=False):
+    """Calls a content endpoint (upload/download), passing arguments in the Dropbox-API-Arg header."""
+    url = f"{DROPBOX_CONTENT_URL}/{endpoint}"
+    headers = {"Dropbox-API-Arg": json.dumps(arg), "Authorization": f"Bearer {get_access_token()}"}
+    if data is not None:
+        headers["Content-Type"] = "application/octet-stream"
+
+    response = http_client.request("POST", url, headers=headers, data=data, stream=stream)
+    if response.status_code == 401:  # Token expired, refresh and retry
+        headers["Authorization"] = f"Bearer {refresh_dropbox_token()}"
+        response = http_client.request("POST", url, headers=headers, data=data, stream=stream)
+    return response
+
+def download_file(path, local_path=None, progress=None):
+    """Streams a Dropbox file to disk in fixed-size chunks and verifies it against Dropbox's content_hash."""
+    local_path = local_path or os.path.join(DOWNLOAD_DIR, os.path.basename(path))
+    response = content_request("files/download", {"path": path}, stream=True)
+    if response.status_code != 200:
+        return {"status": "error", "path": path, "message": response.text}
+
+    metadata = json.loads(response.headers.get("Dropbox-API-Result", "{}"))
+    tracker = Progress(path, metadata.get("size", 0), progress)
+    hasher = ContentHasher()
+    os.makedirs(os.path.dirname(local_path) or ".", exist_ok=True)
+    tmp_path = f"{local_path}.part"
+    try:
+        with open(tmp_path, "wb") as f:
+            for chunk in response.iter_content(READ_CHUNK_SIZE):
+                f.write(chunk)
+                hasher.update(chunk)
+                tracker.advance(len(chunk))
+    finally:
+        response.close()
+
+    content_hash = hasher.hexdigest()
+    if metadata.get("content_hash") and content_hash != metadata["content_hash"]:
+        os.remove(tmp_path)
+        return {"status": "error", "path": path, "message": "Checksum mismatch: the download was corrupted."}
+    os.replace(tmp_path, local_path)
+    return {"status": "success", "path": path, "local_path": local_path, "size": tracker.done, "content_hash": content_hash, "rev": metadata.get("rev")}
+
+def upload_file(local_path, dropbox_path, mode="add", progress=None):
+    """Uploads a local file, through an upload session when it's larger than one chunk. Memory use stays at one chunk."""
+    if not os.path.isfile(local_path):
+        return {"status": "error", "path": dropbox_path, "message": f"Local file not found: {local_path}"}
+
+    size = os.path.getsize(local_path)
+    commit = {"path": dropbox_path, "mode": mode, "autorename": mode == "add"}
+    tracker = Progress(dropbox_path, size, progress)
+    hasher = ContentHasher()
+
+    with open(local_path, "rb") as f:
+        if size <= SIMPLE_UPLOAD_MAX:
+            data = f.read()
+            hasher.update(data)
+            response = content_request("files/upload", commit, data=data)
+            tracker.advance(len(data))
+        else:
+            chunk = f.read(UPLOAD_CHUNK_SIZE)
+            hasher.update(chunk)
+            response = content_request("files/upload_session/start", {"close": False}, data=chunk)
+            if response.status_code != 200:
+                return {"status": "error", "path": dropbox_path, "message": response.text}
+            cursor = {"session_id": response.json()["session_id"], "offset": len(chunk)}
+            tracker.advance(len(chunk))
+
+            while cursor["offset"] + UPLOAD_CHUNK_SIZE < size:
+                chunk = f.read(UPLOAD_CHUNK_SIZE)
+                hasher.update(chunk)
+                response = content_request("files/upload_session/append_v2", {"cursor": cursor, "close": False}, data=chunk)
+                if response.status_code != 200:
+                    return {"status": "error", "path": dropbox_path, "message": response.text}
+                cursor["offset"] += len(chunk)
+                tracker.advance(len(chunk))
+
+            chunk = f.read()
+            hasher.update(chunk)
+            response = content_request("files/upload_session/finish", {"cursor": cursor, "commit": commit}, data=chunk)
+            tracker.advance(len(chunk))
+
+    if response.status_code != 200:
+        return {"status": "error", "path": dropbox_path, "message": response.text}
+    metadata = response.json()
+    if metadata.get("content_hash") != hasher.hexdigest():
+        return {"status": "error", "path": dropbox_path, "message": "Checksum mismatch: Dropbox stored different content."}
+    return {"status": "success", "path": metadata.get("path_display", dropbox_path), "local_path": local_path, "size": size, "content_hash": metadata["content_hash"], "rev": metadata.get("rev")}
+
+def run_transfers(jobs):
+    """Runs transfer jobs (callables returning a result dict) in parallel and summarizes them."""
+    with concurrent.futures.ThreadPoolExecutor(TRANSFER_WORKERS) as executor:
+        futures = [executor.submit(job) for job in jobs]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append({"status": "error", "message": f"{type(e).__name__}: {e}"})
+
+    failed = sum(1 for result in results if result["status"] != "success")
+    status = "success" if not failed else ("partial" if failed < len(results) else "error")
+    return {"status": status, "transfers": results}
+
+def download_files(paths, local_dir=DOWNLOAD_DIR):
+    """Downloads several files in parallel into local_dir."""
+    return run_transfers([
+        lambda path=path: download_file(path, os.path.join(local_dir, os.path.basename(path))) for path in paths
+    ])
+
+def upload_files(files, mode="add"):
+    """Uploads several files in parallel. files is a list of {"local_path", "dropbox_path"}."""
+    return run_transfers([
+        lambda item=item: upload_file(item["local_path"], item["dropbox_path"], mode) for item in files
+    ])
 
 def generate_temporary_link(path):
-    """Generate a temporary download link."""
+    """Generate a temporary download link, reusing a cached one while the file's rev is unchanged."""
+    index = ensure_index(full_sync=False)
+    metadata = index.get(path) if index is not None else None
+    if metadata is not None:
+        link = index.get_link(path, metadata.get("rev"))
+        if link:
+            return {"status": "success", "link": link}
+
+    # An index miss may just be a file newer than the last sync, so Dropbox decides whether it exists
     result = make_request("files/get_temporary_link", json_payload={"path": path})
-    return {"status": "success", "link": result.get("link")} if isinstance(result, dict) and "link" in result else result
+    if isinstance(result, dict) and "link" in result:
+        rev = (result.get("metadata") or metadata or {}).get("rev")
+        if index is not None and rev:
+            index.set_link(path, rev, result["link"], time.time() + LINK_CACHE_SECONDS)
+        return {"status": "success", "link": result.get("link")}
+    return result
 
 def move_file(source_path, destination_path):
     """Move a file within Dropbox."""
     result = make_request("files/move_v2", json_payload={"from_path": source_path, "to_path": destination_path})
-    return {"status": "success", "message": f"Moved {source_path} to {destination_path}"} if isinstance(result, dict) and "metadata" in result else result
+    if isinstance(result, dict) and "metadata" in result:
+        if dropbox_index.get_index().cursor():
+            sync_index()
+        return {"status": "success", "message": f"Moved {source_path} to {destination_path}"}
+    return result
+
+def execute_action(action, params):
+    """Runs an action in the caller's process, so the index watcher outlives a single request."""
+    if action == "get_supported_actions":
+        return get_supported_actions()
+    elif action == "search_files":
+        return search_files(params.get("query", ""), params.get("live", False))
+    elif action == "download_file":
+        return download_file(params.get("path", ""), params.get("local_path"))
+    elif action == "download_files":
+        return download_files(params.get("paths", []), params.get("local_dir", DOWNLOAD_DIR))
+    elif action == "upload_file":
+        return upload_file(params.get("local_path", ""), params.get("dropbox_path", ""), params.get("mode", "add"))
+    elif action == "upload_files":
+        return upload_files(params.get("files", []), params.get("mode", "add"))
+    elif action == "generate_temporary_link":
+        return generate_temporary_link(params.get("path", ""))
+    elif action == "file_exists":
+        return file_exists(params.get("path", ""))
+    elif action == "move_file":
+        return move_file(params.get("source_path", ""), params.get("destination_path", ""))
+    elif action == "sync_index":
+        return sync_index(params.get("full", False))
+    elif action == "watch_index":
+        return watch_index()
+    return {"status": "error", "message": "Invalid action"}
 
 def main():
     parser = argparse.ArgumentParser(description="Dropbox CLI Tool")
-    parser.add_argument("action", choices=["search_files", "download_file", "generate_temporary_link", "move_file", "get_supported_actions"], help="Action to perform")
+    parser.add_argument("action", choices=["search_files", "download_file", "download_files", "upload_file", "upload_files", "generate_temporary_link", "file_exists", "move_file", "sync_index", "watch_index", "get_supported_actions"], help="Action to perform")
     parser.add_argument("--params", type=str, help="JSON-encoded parameters for the action")
 
     args = parser.parse_args()
-
-    if args.action == "get_supported_actions":
-        print(json.dumps(get_supported_actions(), indent=4))
-        return
-
     params = json.loads(args.params) if args.params else {}
-
-    if args.action == "search_files":
-        result = search_files(params.get("query", ""))
-    elif args.action == "download_file":
-        result = download_file(params.get("path", ""))
-    elif args.action == "generate_temporary_link":
-        result = generate_temporary_link(params.get("path", ""))
-    elif args.action == "move_file":
-        result = move_file(params.get("source_path", ""), params.get("destination_path", ""))
-    else:
-        result = {"status": "error", "message": "Invalid action"}
-
-    print(json.dumps(result, indent=4))
+    print(json.dumps(execute_action(args.action, params), indent=4))
 
 if __name__ == "__main__":
     main()
@@ -1,8 +1,9 @@
 import argparse
-import requests
 import json
 import base64
 
+import http_client
+
 # 🔥 HARDCODED GITHUB API TOKEN
 GITHUB_ACCESS_TOKEN = ""
 
@@ -34,7 +35,7 @@ def github_request(method, endpoint, data=None):
         "Accept": "application/vnd.github.v3+json"
     }
     url = f"{GITHUB_API_BASE}{endpoint}"
-    response = requests.request(method, url, headers=headers, json=data)
+    response = http_client.request(method, url, headers=headers, json=data)
     
     if response.status_code >= 400:
         return {
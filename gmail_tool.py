@@ -1,34 +1,51 @@
 import json
-import os
 import argparse
 import base64
+from datetime import timezone
+from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
 from google.oauth2.credentials import Credentials
 
+import credential_provider
+
 CREDENTIALS_FILE = "credentials.json"
 TOKEN_FILE = "token.json"
 
-def load_credentials():
-    """Loads OAuth credentials from credentials.json."""
-    if os.path.exists(CREDENTIALS_FILE):
-        with open(CREDENTIALS_FILE, "r") as f:
-            creds = json.load(f)
-        return Credentials(
-            token=creds.get("gmail_access_token"),
-            refresh_token=creds.get("gmail_refresh_token"),
-            client_id=creds.get("gmail_client_id"),
-            client_secret=creds.get("gmail_client_secret"),
-            token_uri=creds.get("gmail_token_uri")
-        )
-    return None
+def load_credentials(provider=None):
+    """Loads OAuth credentials from credentials.json (cached until the file changes)."""
+    provider = provider or credential_provider.get_provider()
+    if not provider.get("gmail_access_token") and not provider.get("gmail_refresh_token"):
+        return None
+    return Credentials(
+        token=provider.get("gmail_access_token"),
+        refresh_token=provider.get("gmail_refresh_token"),
+        client_id=provider.get("gmail_client_id"),
+        client_secret=provider.get("gmail_client_secret"),
+        token_uri=provider.get("gmail_token_uri")
+    )
+
+def refresh_credentials(creds):
+    """Refreshes the OAuth token in place; the cached service keeps using the same object."""
+    creds.refresh(Request())
+    expiry = creds.expiry.replace(tzinfo=timezone.utc).timestamp() if creds.expiry else None
+    return creds.token, expiry
+
+def build_service(provider):
+    """Builds the Gmail client once per credentials version and keeps its token refreshed ahead of expiry."""
+    creds = load_credentials(provider)
+    if not creds:
+        return None
+    service = build("gmail", "v1", credentials=creds, cache_discovery=False)
+    if creds.refresh_token:
+        provider.register_token("gmail", lambda: refresh_credentials(creds))
+    return service
 
 def execute_action(action, params):
     """Executes a Gmail API action."""
-    creds = load_credentials()
-    if not creds:
+    service = credential_provider.get_provider().client("gmail", build_service)
+    if not service:
         return {"status": "error", "message": "Missing OAuth token. Authenticate first."}
     
-    service = build("gmail", "v1", credentials=creds)
     email_query = params.get("input", "")
     
     try:
@@ -0,0 +1,151 @@
+import logging
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CONNECT_TIMEOUT = float(os.getenv("ORCHESTRATE_HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("ORCHESTRATE_HTTP_READ_TIMEOUT", "60"))
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5        # Seconds; retry n waits BACKOFF_BASE * 2**n, jittered
+BACKOFF_MAX = 30
+RETRY_AFTER_MAX = 120     # Never sleep longer than this for a Retry-After header
+POOL_SIZE = 16            # Keep-alive connections per host
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# 🔥 Only these are retried after a 5xx or a dropped connection; a POST may already have taken effect
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+
+def get_session(url):
+    """Returns the shared keep-alive session for a URL's host."""
+    parts = urlsplit(url)
+    host = f"{parts.scheme}://{parts.netloc}"
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[host] = session
+        return session
+
+
+def retry_delay(response, attempt):
+    """Seconds to wait before retry number attempt: Retry-After if given, else jittered exponential backoff."""
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return min(RETRY_AFTER_MAX, max(0.0, float(retry_after)))
+        except ValueError:
+            try:
+                return min(RETRY_AFTER_MAX, max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time()))
+            except (TypeError, ValueError):
+                pass
+    return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+def _record(host, seconds, status=None, retried=False):
+    with _metrics_lock:
+        m = _metrics.setdefault(host, {"requests": 0, "errors": 0, "retries": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+        m["requests"] += 1
+        m["total_seconds"] += seconds
+        m["max_seconds"] = max(m["max_seconds"], seconds)
+        if retried:
+            m["retries"] += 1
+        if status is None or status >= 400:
+            m["errors"] += 1
+        m["last_status"] = status
+
+
+def get_metrics():
+    """Per-host request counts, errors, retries and latency (seconds) since the process started."""
+    with _metrics_lock:
+        return {
+            host: {**m, "avg_seconds": round(m["total_seconds"] / m["requests"], 4) if m["requests"] else 0.0}
+            for host, m in _metrics.items()
+        }
+
+
+def request(method, url, timeout=None, retries=MAX_RETRIES, retry_statuses=RETRY_STATUSES, retry_unsafe=False, **kwargs):
+    """Sends a request over the host's pooled session and returns the requests.Response.
+
+    429s are always retried (the server did not process the request). 5xx responses and
+    connection errors are retried only for idempotent methods unless retry_unsafe=True.
+    The last response is returned as-is once retries run out; the last exception is re-raised.
+    """
+    method = method.upper()
+    timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+    host = urlsplit(url).netloc
+    session = get_session(url)
+    retry_all = retry_unsafe or method in IDEMPOTENT_METHODS
+
+    for attempt in range(retries + 1):
+        started = time.monotonic()
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            _record(host, time.monotonic() - started, retried=attempt > 0)
+            # A connect failure means nothing was sent, so even a POST is safe to repeat
+            if attempt == retries or not (retry_all or isinstance(e, requests.ConnectTimeout)):
+                raise
+            delay = retry_delay(None, attempt)
+            logging.warning(f"⚠️ {method} {host} failed ({type(e).__name__}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+
+        _record(host, time.monotonic() - started, response.status_code, retried=attempt > 0)
+        retryable = response.status_code in retry_statuses and (response.status_code == 429 or retry_all)
+        if not retryable or attempt == retries:
+            return response
+        delay = retry_delay(response, attempt)
+        logging.warning(f"⚠️ {method} {host} returned {response.status_code}, retrying in {delay:.1f}s")
+        time.sleep(delay)
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across threads (e.g. an API's requests-per-second cap)."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def rate_limiter(name, rate):
+    """Returns the process-wide limiter for name (e.g. one per API or per Airtable base)."""
+    with _limiters_lock:
+        if name not in _limiters:
+            _limiters[name] = RateLimiter(rate)
+        return _limiters[name]
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
@@ -1,18 +1,38 @@
-import requests
 import json
 import argparse
-import os
+
+import credential_provider
+import http_client
+import image_cache
 
 CREDENTIALS_FILE = "credentials.json"
 IDEOGRAM_URL = "https://api.ideogram.ai/generate"
+BATCH_RATE = 2           # Generation requests started per second in generate_batch
+BATCH_WORKERS = 4        # Generations in flight at once in generate_batch
 
 def load_api_key():
-    """Loads API key from credentials.json."""
-    if os.path.exists(CREDENTIALS_FILE):
-        with open(CREDENTIALS_FILE, "r") as f:
-            creds = json.load(f)
-        return creds.get("ideogram_api_key")
-    return None
+    """Loads API key from credentials.json (cached until the file changes)."""
+    return credential_provider.get_provider().get("ideogram_api_key")
+
+def request_image(api_key, prompt, options):
+    """Sends one generation request to Ideogram and returns the requests.Response."""
+    headers = {"Api-Key": api_key, "Content-Type": "application/json"}
+    aspect_ratio = options.get("aspect_ratio", "ASPECT_16_9")
+    model = options.get("model", "V_2")
+    
+    payload = {"image_request": {"prompt": prompt, "aspect_ratio": aspect_ratio, "model": model}}
+    return http_client.post(IDEOGRAM_URL, headers=headers, json=payload)
+
+def generate(api_key, prompt, options):
+    """Generates images for one prompt. Returns {"status": "success", "images": [urls]} or an error."""
+    response = request_image(api_key, prompt, options)
+    if response.status_code != 200:
+        return {"status": "error", "message": f"Request failed: {response.status_code}"}
+    try:
+        data = response.json()
+    except json.JSONDecodeError:
+        return {"status": "error", "message": "Invalid JSON response from Ideogram."}
+    return {"status": "success", "images": [image["url"] for image in data.get("data", []) if image.get("url")]}
 
 def execute_action(action, params):
     """Executes an Ideogram API request."""
@@ -20,14 +40,17 @@ def execute_action(action, params):
     if not api_key:
         return {"status": "error", "message": "Missing API key in credentials.json"}
     
-    headers = {"Api-Key": api_key, "Content-Type": "application/json"}
-    prompt = params.get("input", "")
     options = params.get("options", {})
-    aspect_ratio = options.get("aspect_ratio", "ASPECT_16_9")
-    model = options.get("model", "V_2")
-    
-    payload = {"image_request": {"prompt": prompt, "aspect_ratio": aspect_ratio, "model": model}}
-    response = requests.post(IDEOGRAM_URL, headers=headers, json=payload)
+    if action == "generate_batch":
+        prompts = params.get("prompts") or params.get("input") or []
+        if not isinstance(prompts, list) or not prompts:
+            return {"status": "error", "message": "'prompts' must be a non-empty list."}
+        return image_cache.generate_batch(
+            "ideogram", prompts, options, lambda prompt, opts: generate(api_key, prompt, opts),
+            rate=BATCH_RATE, workers=BATCH_WORKERS
+        )
+
+    response = request_image(api_key, params.get("input", ""), options)
     
     try:
         return response.json() if response.status_code == 200 else {"status": "error", "message": "API request failed"}
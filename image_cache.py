@@ -0,0 +1,134 @@
+import concurrent.futures
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import tempfile
+import threading
+from urllib.parse import urlsplit
+
+import http_client
+import json_store
+
+CACHE_DIR = ".image_cache"
+DOWNLOAD_WORKERS = 8
+CHUNK_SIZE = 1 << 16
+
+
+def request_key(provider, prompt, options):
+    """Identifies a generation request: the same provider, prompt and options give the same key."""
+    raw = json.dumps([provider, prompt, options or {}], sort_keys=True)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class ImageCache:
+    """Generated images stored by content hash (blobs/ab/abcd….png), plus an index from request key to files.
+
+    Identical images are stored once, and a prompt that has already been generated with the
+    same options is answered from disk instead of the provider.
+    """
+
+    def __init__(self, root=CACHE_DIR):
+        self.root = root
+        os.makedirs(os.path.join(root, "blobs"), exist_ok=True)
+        self.index = json_store.get_store(os.path.join(root, "index.json"), {"entries": {}}, indent=2)
+
+    def lookup(self, key):
+        """Returns the cached paths for a request key, or None if any file is missing."""
+        entry = self.index.read()["entries"].get(key)
+        if entry and all(os.path.exists(path) for path in entry["paths"]):
+            return entry["paths"]
+        return None
+
+    def download(self, url):
+        """Streams an image to disk, hashing as it goes, and returns its content-addressed path."""
+        response = http_client.get(url, stream=True)
+        response.raise_for_status()
+        extension = os.path.splitext(urlsplit(url).path)[1] or mimetypes.guess_extension(
+            response.headers.get("Content-Type", "").split(";")[0]
+        ) or ".img"
+
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    digest.update(chunk)
+                    f.write(chunk)
+            sha = digest.hexdigest()
+            path = os.path.join(self.root, "blobs", sha[:2], f"{sha}{extension}")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+    def store(self, key, prompt, urls, paths):
+        self.index.set(["entries", key], {"prompt": prompt, "urls": urls, "paths": paths})
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache():
+    """Returns the process-wide image cache."""
+    root = os.getenv("ORCHESTRATE_IMAGE_CACHE_DIR", CACHE_DIR)
+    with _caches_lock:
+        if root not in _caches:
+            _caches[root] = ImageCache(root)
+        return _caches[root]
+
+
+def generate_batch(provider, prompts, options, generate, rate, workers):
+    """Generates images for many prompts at once and returns a manifest of prompt -> local paths.
+
+    generate(prompt, options) must return {"status": "success", "images": [urls]} or an error dict.
+    Calls are started at most rate per second with up to workers in flight, and every image is
+    downloaded in parallel as soon as its generation finishes. Cached prompts are skipped.
+    """
+    cache = get_cache()
+    limiter = http_client.rate_limiter(f"{provider}:generate", rate)
+    manifest, errors, cached = {}, {}, 0
+    todo = {}
+    for prompt in dict.fromkeys(prompts):
+        key = request_key(provider, prompt, options)
+        paths = cache.lookup(key)
+        if paths:
+            manifest[prompt] = paths
+            cached += 1
+        else:
+            todo[prompt] = key
+
+    def run(prompt):
+        limiter.wait()
+        result = generate(prompt, options)
+        if result.get("status") != "success":
+            return result
+        paths = list(downloads.map(cache.download, result["images"]))
+        cache.store(todo[prompt], prompt, result["images"], paths)
+        return {"status": "success", "paths": paths}
+
+    with concurrent.futures.ThreadPoolExecutor(DOWNLOAD_WORKERS) as downloads, \
+            concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        futures = {executor.submit(run, prompt): prompt for prompt in todo}
+        for future in concurrent.futures.as_completed(futures):
+            prompt = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {"status": "error", "message": f"{type(e).__name__}: {e}"}
+            if result["status"] == "success":
+                manifest[prompt] = result["paths"]
+            else:
+                errors[prompt] = result.get("message", "Generation failed.")
+                logging.warning(f"⚠️ {provider} generation failed for '{prompt[:60]}': {errors[prompt]}")
+
+    status = "success" if not errors else ("partial" if manifest else "error")
+    result = {"status": status, "manifest": manifest, "generated": len(todo) - len(errors), "cached": cached}
+    if errors:
+        result["errors"] = errors
+    return result
@@ -1,9 +1,11 @@
 import json
 import os
 import argparse
-import requests
 import logging
 
+import http_client
+import tool_registry
+
 # 🔥 Paths
 MARKETPLACE_JSON = "orchestrate_marketplace.json"
 TOOLS_JSON = "orchestrate_tools.json"
@@ -41,7 +43,7 @@ def install_tool(tool_name):
         return {"error": f"Tool '{tool_name}' does not have a valid GitHub URL."}
 
     # 🔥 Download the tool from GitHub
-    response = requests.get(repo_url)
+    response = http_client.get(repo_url)
 
     if response.status_code != 200:
         return {"error": f"Failed to download '{tool_name}' from {repo_url} (HTTP {response.status_code})."}
@@ -56,6 +58,7 @@ def install_tool(tool_name):
     # 🔥 Register only the relative path in orchestrate_tools.json
     tools.setdefault("tools", {})[tool_name] = {"path": tool_filename}
     save_json(TOOLS_JSON, tools)
+    tool_registry.signal_change()
 
     # 🔥 Update marketplace status
     marketplace["tools"][tool_name]["installed"] = True
@@ -79,6 +82,7 @@ def uninstall_tool(tool_name):
     # 🔥 Remove from orchestrate_tools.json
     del tools["tools"][tool_name]
     save_json(TOOLS_JSON, tools)
+    tool_registry.signal_change()
 
     # 🔥 Update marketplace status
     if "tools" in marketplace and tool_name in marketplace["tools"]:
@@ -0,0 +1,258 @@
+import atexit
+import copy
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# 🔥 Mutations are appended to <file>.journal and folded into <file> once the journal grows
+FSYNC_EVERY = 32          # Journal writes between fsyncs
+FSYNC_INTERVAL = 1.0      # ...or seconds since the last fsync, whichever comes first
+COMPACT_OPS = 500         # Compact after this many journaled ops
+COMPACT_BYTES = 1 << 20   # ...or once the journal is this large
+
+
+class JournaledStore:
+    """A JSON document persisted as a snapshot plus an append-only JSONL journal.
+
+    Writes append one mutation line instead of rewriting the file. Reads are served from an
+    in-memory view that replays only journal lines it hasn't seen. A flock on <file>.lock keeps
+    parallel tool processes from losing updates. The snapshot keeps the original file's
+    format, so plain readers still see everything up to the last compaction.
+    """
+
+    def __init__(self, path, default=None, indent=4):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.lock_path = f"{path}.lock"
+        self.default = default if default is not None else {}
+        self.indent = indent
+        self._data = None
+        self._snapshot_signature = None
+        self._snapshot_hash = None
+        self._stale_journal = False
+        self._journal_offset = 0
+        self._journal_ops = 0
+        self._unsynced = 0
+        self._last_fsync = time.monotonic()
+        self._journal = None
+        self._thread_lock = threading.RLock()
+        self._lock_depth = 0
+        self._lock_file = None
+
+    # --- Locking -------------------------------------------------------------
+
+    @contextmanager
+    def _locked(self, exclusive):
+        with self._thread_lock:
+            if self._lock_depth == 0:
+                self._lock_file = open(self.lock_path, "a")
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    # --- Materialized view -----------------------------------------------------
+
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _catch_up(self):
+        """Brings the in-memory view up to date with the snapshot and journal on disk."""
+        signature = self._signature()
+        if self._data is None or signature != self._snapshot_signature:
+            # First load, or another process compacted: start over from the snapshot
+            raw = b""
+            if signature is not None:
+                with open(self.path, "rb") as f:
+                    raw = f.read()
+            self._data = json.loads(raw) if raw.strip() else copy.deepcopy(self.default)
+            self._snapshot_signature = signature
+            self._snapshot_hash = hashlib.sha1(raw).hexdigest()
+            self._stale_journal = False
+            self._journal_offset = 0
+            self._journal_ops = 0
+
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, "rb") as f:
+            f.seek(self._journal_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Torn write from a crashed process; ignore until it's completed
+                self._journal_offset += len(line)
+                if self._stale_journal or not line.strip():
+                    continue
+                op = json.loads(line)
+                if op["op"] == "base":
+                    # A journal written against another snapshot was already folded in by a
+                    # compaction that crashed before truncating it; replaying would duplicate it
+                    self._stale_journal = op["snapshot"] != self._snapshot_hash
+                    continue
+                self._apply(op)
+                self._journal_ops += 1
+
+    def _apply(self, op):
+        key = op.get("key", [])
+        if op["op"] == "set" and not key:
+            self._data = op["value"]
+            return
+
+        # Walk to the container, creating missing dicts on the way (and the list itself for append/extend)
+        container_key = key[:-1] if op["op"] == "set" else key
+        parent = self._data
+        for index, part in enumerate(container_key):
+            if isinstance(parent, dict) and part not in parent:
+                parent[part] = [] if op["op"] != "set" and index == len(container_key) - 1 else {}
+            parent = parent[part]
+
+        if op["op"] == "set":
+            parent[key[-1]] = op["value"]
+        elif op["op"] == "append":
+            parent.append(op["value"])
+        elif op["op"] == "extend":
+            parent.extend(op["value"])
+        else:
+            raise ValueError(f"Unknown journal op: {op['op']}")
+
+    # --- Public API --------------------------------------------------------------
+
+    def read(self):
+        """Returns the current document. Treat it as read-only; mutate through append/extend/set."""
+        with self._locked(exclusive=False):
+            self._catch_up()
+            return self._data
+
+    @contextmanager
+    def transaction(self):
+        """Holds the write lock across read-check-write sequences, yielding the current view."""
+        with self._locked(exclusive=True):
+            self._catch_up()
+            yield self._data
+            self._maybe_compact()
+
+    def append(self, key, value):
+        """Appends value to the list at key (a list of dict keys / list indexes)."""
+        self._write({"op": "append", "key": list(key), "value": value})
+
+    def extend(self, key, values):
+        self._write({"op": "extend", "key": list(key), "value": list(values)})
+
+    def set(self, key, value):
+        self._write({"op": "set", "key": list(key), "value": value})
+
+    def _write(self, op):
+        with self._locked(exclusive=True):
+            self._catch_up()
+            if self._stale_journal:
+                self._reset_journal()
+            self._drop_torn_tail()
+            self._apply(op)
+
+            line = (json.dumps(op) + "\n").encode("utf-8")
+            if self._journal_offset == 0:
+                line = (json.dumps({"op": "base", "snapshot": self._snapshot_hash}) + "\n").encode("utf-8") + line
+            if self._journal is None:
+                self._journal = open(self.journal_path, "ab")
+            self._journal.write(line)
+            self._journal.flush()
+            self._journal_offset += len(line)
+            self._journal_ops += 1
+            self._unsynced += 1
+            if self._unsynced >= FSYNC_EVERY or time.monotonic() - self._last_fsync >= FSYNC_INTERVAL:
+                self.sync()
+            if self._lock_depth == 1:
+                self._maybe_compact()
+
+    def _drop_torn_tail(self):
+        """Truncates a partial last line left by a crashed writer. Caller holds the exclusive lock.
+
+        _catch_up stops at the last complete line, so anything past _journal_offset is a torn
+        write. Appending after it would glue the fragment onto the next op and corrupt both.
+        """
+        try:
+            size = os.path.getsize(self.journal_path)
+        except FileNotFoundError:
+            return
+        if size > self._journal_offset:
+            os.truncate(self.journal_path, self._journal_offset)
+
+    def sync(self):
+        """fsyncs any journal writes not yet on disk."""
+        with self._thread_lock:
+            if self._journal is not None and self._unsynced:
+                os.fsync(self._journal.fileno())
+            self._unsynced = 0
+            self._last_fsync = time.monotonic()
+
+    def _maybe_compact(self):
+        if self._journal_ops >= COMPACT_OPS or self._journal_offset >= COMPACT_BYTES:
+            self.compact()
+
+    def compact(self):
+        """Writes the current view as the new snapshot and empties the journal."""
+        with self._locked(exclusive=True):
+            self._catch_up()
+            raw = json.dumps(self._data, indent=self.indent).encode("utf-8")
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(raw)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+            # Readers notice the new snapshot inode and reload before reading the journal again
+            self._snapshot_signature = self._signature()
+            self._snapshot_hash = hashlib.sha1(raw).hexdigest()
+            self._reset_journal()
+
+    def _reset_journal(self):
+        """Empties the journal. Caller holds the exclusive lock."""
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        with open(self.journal_path, "w"):
+            pass
+        self._stale_journal = False
+        self._journal_offset = 0
+        self._journal_ops = 0
+        self._unsynced = 0
+
+    def close(self):
+        self.sync()
+        with self._thread_lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path, default=None, indent=4):
+    """Returns the process-wide store for a file, so long-lived processes keep their view warm."""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = JournaledStore(path, default, indent)
+        return _stores[key]
+
+
+@atexit.register
+def _close_stores():
+    for store in list(_stores.values()):
+        store.close()
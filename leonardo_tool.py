@@ -1,21 +1,168 @@
-import requests
 import json
 import argparse
+import concurrent.futures
+import logging
+import os
+import threading
 import time
 
+import credential_provider
+import http_client
+import image_cache
+import json_store
+
 CREDENTIALS_FILE = "credentials.json"
 BASE_URL = "https://cloud.leonardo.ai/api/rest/v1"
+JOBS_FILE = "leonardo_jobs.json"
+
+# 🔥 One background thread polls every pending generation; each job backs off on its own schedule
+POLL_INITIAL = 4.0       # Seconds before a new generation's first poll
+POLL_MAX = 20.0          # Longest gap between polls of one generation
+POLL_BACKOFF = 1.5       # Gap multiplier after each "still pending"
+POLL_WORKERS = 8         # Generations polled at once per sweep
+JOB_TIMEOUT = 300        # Give up on a generation after this many seconds
+WAIT_TIMEOUT = 30        # How long generate_image blocks when wait=True
+BATCH_RATE = 2           # Generations submitted per second in generate_batch
+BATCH_WORKERS = 16       # Generations in flight at once in generate_batch (each mostly waits on the poller)
 
 def load_api_key():
-    """Loads Leonardo API key from credentials.json."""
-    if os.path.exists(CREDENTIALS_FILE):
-        with open(CREDENTIALS_FILE, "r") as f:
-            creds = json.load(f)
-        return creds.get("leonardo_api_key")
-    return None
-
-def generate_image(api_key, prompt, width=1024, height=768, num_images=1, preset_style="DYNAMIC", model_id="b24e16ff-06e3-43eb-8d33-4416c2d75876"):
-    """Generates images using Leonardo AI."""
+    """Loads Leonardo API key from credentials.json (cached until the file changes)."""
+    return credential_provider.get_provider().get("leonardo_api_key")
+
+def jobs_store():
+    return json_store.get_store(os.getenv("LEONARDO_JOBS_FILE", JOBS_FILE), {"jobs": {}}, indent=2)
+
+def fetch_generated_image(api_key, generation_id):
+    """Polls a generation once. Returns status "pending", "success" (with image URLs) or "error"."""
+    headers = {"Authorization": f"Bearer {api_key}", "Accept": "application/json"}
+    response = http_client.get(f"{BASE_URL}/generations/{generation_id}", headers=headers)
+    if response.status_code != 200:
+        return {"status": "error", "message": f"Request failed: {response.status_code}", "details": response.text}
+
+    data = response.json()
+    generation = data.get("generations_by_pk") or data
+    images = generation.get("generated_images") or generation.get("generatedImages") or []
+    if images:
+        return {"status": "success", "images": [img["url"] for img in images]}
+    if generation.get("status") == "FAILED":
+        return {"status": "error", "message": "Leonardo reported the generation as failed."}
+    return {"status": "pending"}
+
+class GenerationPoller:
+    """Tracks submitted generations and polls the due ones in concurrent sweeps from one thread.
+
+    Finished jobs are written to leonardo_jobs.json, so generation_status works from any process,
+    and announced to in-process callbacks and to the job's callback_url, if it has one.
+    """
+
+    def __init__(self):
+        self._pending = {}  # generation_id -> {"next_poll", "interval", "deadline", "callbacks"}
+        self._done = {}     # generation_id -> threading.Event, for wait()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def track(self, generation_id, on_complete=None):
+        now = time.monotonic()
+        with self._lock:
+            job = self._pending.setdefault(generation_id, {
+                "next_poll": now + POLL_INITIAL, "interval": POLL_INITIAL, "deadline": now + JOB_TIMEOUT, "callbacks": []
+            })
+            if on_complete:
+                job["callbacks"].append(on_complete)
+            self._done.setdefault(generation_id, threading.Event())
+            if not self._thread or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def pending(self):
+        with self._lock:
+            return list(self._pending)
+
+    def wait(self, generation_id, timeout):
+        """Blocks until the generation finishes or timeout passes. Returns True if it finished."""
+        with self._lock:
+            done = self._done.get(generation_id)
+        return done.wait(timeout) if done else True
+
+    def _run(self):
+        with concurrent.futures.ThreadPoolExecutor(POLL_WORKERS) as executor:
+            while True:
+                now = time.monotonic()
+                with self._lock:
+                    due = [gid for gid, job in self._pending.items() if job["next_poll"] <= now]
+                    next_poll = min((job["next_poll"] for job in self._pending.values()), default=now + 60)
+
+                if due:
+                    api_key = load_api_key()
+                    for gid, result in zip(due, executor.map(lambda gid: self._poll(api_key, gid), due)):
+                        self._handle(gid, result)
+                    continue
+
+                self._wake.wait(max(0.1, next_poll - now))
+                self._wake.clear()
+
+    def _poll(self, api_key, generation_id):
+        try:
+            return fetch_generated_image(api_key, generation_id)
+        except Exception as e:
+            return {"status": "error", "message": str(e), "transient": True}
+
+    def _handle(self, generation_id, result):
+        now = time.monotonic()
+        with self._lock:
+            job = self._pending[generation_id]
+            finished = result["status"] == "success" or (result["status"] == "error" and not result.get("transient"))
+            if not finished and now >= job["deadline"]:
+                result = {"status": "error", "message": "Image generation timed out."}
+                finished = True
+            if not finished:
+                # Still rendering (or a network blip): back off before the next look
+                job["interval"] = min(POLL_MAX, job["interval"] * POLL_BACKOFF)
+                job["next_poll"] = now + job["interval"]
+                return
+            del self._pending[generation_id]
+
+        record_result(generation_id, result)
+        for callback in job["callbacks"]:
+            try:
+                callback(generation_id, result)
+            except Exception:
+                logging.exception(f"🚨 ERROR: Completion callback for generation {generation_id} failed.")
+        with self._lock:
+            self._done.pop(generation_id).set()
+
+_poller = None
+_poller_lock = threading.Lock()
+
+def get_poller():
+    """Returns the process-wide generation poller."""
+    global _poller
+    with _poller_lock:
+        if _poller is None:
+            _poller = GenerationPoller()
+        return _poller
+
+def record_result(generation_id, result):
+    """Stores a finished generation and POSTs it to the job's callback_url, if one was given."""
+    store = jobs_store()
+    job = store.read()["jobs"].get(generation_id, {})
+    job = {**job, **result, "completed_at": time.time()}
+    store.set(["jobs", generation_id], job)
+    if result["status"] == "success":
+        logging.info(f"✅ Leonardo generation {generation_id} finished with {len(result['images'])} image(s).")
+    else:
+        logging.warning(f"⚠️ Leonardo generation {generation_id} failed: {result['message']}")
+
+    if job.get("callback_url"):
+        try:
+            http_client.post(job["callback_url"], json={"generation_id": generation_id, **result}, retries=1)
+        except Exception as e:
+            logging.warning(f"⚠️ Callback to {job['callback_url']} for generation {generation_id} failed: {e}")
+
+def submit_generation(api_key, prompt, width=1024, height=768, num_images=1, preset_style="DYNAMIC", model_id="b24e16ff-06e3-43eb-8d33-4416c2d75876", callback_url=None, on_complete=None):
+    """Starts a Leonardo generation and returns its id right away. The background poller collects the images."""
     headers = {"Authorization": f"Bearer {api_key}", "Accept": "application/json", "Content-Type": "application/json"}
     payload = {
         "alchemy": True,
@@ -27,56 +174,98 @@ def generate_image(api_key, prompt, width=1024, height=768, num_images=1, preset
         "prompt": prompt
     }
     
-    response = requests.post(f"{BASE_URL}/generations", headers=headers, json=payload)
-    if response.status_code == 200:
-        data = response.json()
-        generation_id = data.get("generationId")
-        if generation_id:
-            return fetch_generated_image(api_key, generation_id)
+    response = http_client.post(f"{BASE_URL}/generations", headers=headers, json=payload)
+    if response.status_code != 200:
+        return {"status": "error", "message": f"Request failed: {response.status_code}", "details": response.text}
+
+    data = response.json()
+    generation_id = data.get("generationId") or (data.get("sdGenerationJob") or {}).get("generationId")
+    if not generation_id:
         return {"status": "error", "message": "Failed to retrieve generation ID."}
-    return {"status": "error", "message": f"Request failed: {response.status_code}", "details": response.text}
 
-def fetch_generated_image(api_key, generation_id):
-    """Fetches a previously generated image using its generation ID."""
-    headers = {"Authorization": f"Bearer {api_key}", "Accept": "application/json"}
-    url = f"{BASE_URL}/generations/{generation_id}"
-    
-    for _ in range(10):  # Retry up to 10 times
-        response = requests.get(url, headers=headers)
-        if response.status_code == 200:
-            data = response.json()
-            images = data.get("generatedImages", [])
-            if images:
-                return {"status": "success", "images": [img["url"] for img in images]}
-        time.sleep(3)  # Wait before retrying
-    
-    return {"status": "error", "message": "Image generation timed out."}
+    job = {"status": "pending", "prompt": prompt, "submitted_at": time.time()}
+    if callback_url:
+        job["callback_url"] = callback_url
+    jobs_store().set(["jobs", generation_id], job)
+    get_poller().track(generation_id, on_complete)
+    return {"status": "pending", "generation_id": generation_id}
+
+def generate_image(api_key, prompt, wait=True, timeout=WAIT_TIMEOUT, **options):
+    """Generates images using Leonardo AI. With wait=False this is submit_generation."""
+    submitted = submit_generation(api_key, prompt, **options)
+    if not wait or submitted["status"] != "pending":
+        return submitted
+    generation_id = submitted["generation_id"]
+    if not get_poller().wait(generation_id, timeout):
+        return {"status": "pending", "generation_id": generation_id, "message": "Still generating. Check generation_status."}
+    return generation_status(api_key, generation_id)
+
+def generation_status(api_key, generation_id):
+    """Returns a generation's stored result, polling once if no poller in this process is tracking it."""
+    if not generation_id:
+        return {"status": "error", "message": "Missing 'generation_id'."}
+    job = jobs_store().read()["jobs"].get(generation_id)
+    if job and job["status"] != "pending":
+        return {"generation_id": generation_id, **job}
+    if generation_id in get_poller().pending():
+        return {"generation_id": generation_id, **(job or {"status": "pending"})}
+
+    # Submitted by a process that has since exited (e.g. a subprocess call): check directly
+    result = fetch_generated_image(api_key, generation_id)
+    if result["status"] != "pending":
+        record_result(generation_id, result)
+    return {"generation_id": generation_id, **(job or {}), **result}
+
+def generate_batch(api_key, prompts, options=None):
+    """Generates every prompt concurrently and returns a manifest of prompt -> cached image paths."""
+    if not isinstance(prompts, list) or not prompts:
+        return {"status": "error", "message": "'prompts' must be a non-empty list."}
+    return image_cache.generate_batch(
+        "leonardo", prompts, options or {},
+        lambda prompt, opts: generate_image(api_key, prompt, timeout=JOB_TIMEOUT, **opts),
+        rate=BATCH_RATE, workers=BATCH_WORKERS
+    )
+
+def list_generations(status=None):
+    """Lists tracked generations, optionally only those with the given status."""
+    jobs = jobs_store().read()["jobs"]
+    return {
+        "status": "success",
+        "generations": {gid: job for gid, job in jobs.items() if status is None or job["status"] == status}
+    }
+
+def execute_action(action, params):
+    """Runs an action in the caller's process, so the poller outlives a single request."""
+    if action == "list_generations":
+        return list_generations(params.get("status"))
+
+    api_key = load_api_key()
+    if not api_key:
+        return {"status": "error", "message": "Leonardo API key is required in credentials.json."}
+
+    if action == "generate_image":
+        return generate_image(api_key, **params)
+    elif action == "generate_batch":
+        return generate_batch(api_key, params.get("prompts"), params.get("options"))
+    elif action == "submit_generation":
+        return submit_generation(api_key, **params)
+    elif action in ("generation_status", "fetch_generated_image"):
+        return generation_status(api_key, params.get("generation_id"))
+    return {"status": "error", "message": "Invalid action"}
 
 def main():
     parser = argparse.ArgumentParser(description="Leonardo AI Tool")
-    parser.add_argument("action", choices=["generate_image", "fetch_generated_image"], help="Action to perform")
+    parser.add_argument("action", choices=["generate_image", "generate_batch", "submit_generation", "generation_status", "fetch_generated_image", "list_generations"], help="Action to perform")
     parser.add_argument("--params", type=str, required=True, help="JSON-encoded parameters")
     args = parser.parse_args()
     
-    api_key = load_api_key()
-    if not api_key:
-        print(json.dumps({"status": "error", "message": "Leonardo API key is required in credentials.json."}, indent=2))
-        return
-    
     try:
         params = json.loads(args.params)
     except json.JSONDecodeError:
         print(json.dumps({"status": "error", "message": "Invalid JSON format."}, indent=2))
         return
     
-    if args.action == "generate_image":
-        result = generate_image(api_key, **params)
-    elif args.action == "fetch_generated_image":
-        result = fetch_generated_image(api_key, params.get("generation_id"))
-    else:
-        result = {"status": "error", "message": "Invalid action"}
-    
-    print(json.dumps(result, indent=2))
+    print(json.dumps(execute_action(args.action, params), indent=2))
 
 if __name__ == "__main__":
     main()
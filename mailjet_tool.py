@@ -1,18 +1,16 @@
-import requests
 import json
 import argparse
-import os
+
+import credential_provider
+import http_client
 
 CREDENTIALS_FILE = "credentials.json"
 MAILJET_URL = "https://api.mailjet.com/v3.1/send"
 
 def load_api_key():
-    """Loads Mailjet API credentials from credentials.json."""
-    if os.path.exists(CREDENTIALS_FILE):
-        with open(CREDENTIALS_FILE, "r") as f:
-            creds = json.load(f)
-        return creds.get("mailjet_api_key"), creds.get("mailjet_api_secret")
-    return None, None
+    """Loads Mailjet API credentials from credentials.json (cached until the file changes)."""
+    provider = credential_provider.get_provider()
+    return provider.get("mailjet_api_key"), provider.get("mailjet_api_secret")
 
 def execute_action(action, params):
     """Executes a Mailjet API request."""
@@ -32,7 +30,7 @@ def execute_action(action, params):
         ]
     }
     
-    response = requests.post(MAILJET_URL, auth=(api_key, api_secret), headers=headers, json=email_data)
+    response = http_client.post(MAILJET_URL, auth=(api_key, api_secret), headers=headers, json=email_data)
     
     try:
         return response.json() if response.status_code == 200 else {"status": "error", "message": "API request failed"}
@@ -1,18 +1,15 @@
-import requests
 import json
 import argparse
-import os
+
+import credential_provider
+import http_client
 
 CREDENTIALS_FILE = "credentials.json"
 MEM_API_URL = "https://api.mem.ai/v1/mems"  # Adjust endpoint if needed
 
 def load_api_key():
-    """Loads Mem API key from credentials.json."""
-    if os.path.exists(CREDENTIALS_FILE):
-        with open(CREDENTIALS_FILE, "r") as f:
-            creds = json.load(f)
-        return creds.get("mem_api_key")
-    return None
+    """Loads Mem API key from credentials.json (cached until the file changes)."""
+    return credential_provider.get_provider().get("mem_api_key")
 
 def execute_action(action, params):
     """Executes a Mem API request."""
@@ -24,7 +21,7 @@ def execute_action(action, params):
     content = params.get("input", "")
     
     if action == "create_mem":
-        response = requests.post(MEM_API_URL, headers=headers, json={"content": content})
+        response = http_client.post(MEM_API_URL, headers=headers, json={"content": content})
         try:
             return response.json() if response.status_code == 200 else {"status": "error", "message": "API request failed"}
         except json.JSONDecodeError:
@@ -1,22 +1,20 @@
 import json
-import os
 import argparse
 
+import json_store
+import semantic_index
+
 BRAIN_FILE = "orchestrate_brain.json"
+OPERATING_LOGIC_KEY = ["orchestrate_brain", "operating_logic"]
+
+def brain_store():
+    """Journaled store behind the Orchestrate Brain file."""
+    return json_store.get_store(BRAIN_FILE, {"orchestrate_brain": {"operating_logic": {}}})
 
 def load_brain():
     """Loads the Orchestrate Brain JSON data, ensuring proper structure."""
-    if os.path.exists(BRAIN_FILE):
-        with open(BRAIN_FILE, "r") as f:
-            data = json.load(f)
-            return data.get("orchestrate_brain", {}).get("operating_logic", {})  # ✅ Corrected search path
-    return {}
-
-def save_brain(data):
-    """Saves updates to the Orchestrate Brain JSON file."""
-    full_data = {"orchestrate_brain": {"operating_logic": data}}
-    with open(BRAIN_FILE, "w") as f:
-        json.dump(full_data, f, indent=4)
+    data = brain_store().read()
+    return data.get("orchestrate_brain", {}).get("operating_logic", {})  # ✅ Corrected search path
 
 def execute_action(action, params):
     """Executes an Orchestrate Brain action."""
@@ -25,21 +23,30 @@ def execute_action(action, params):
     if action == "add_insight":
         category = params.get("input", "")
         content = params.get("options", {}).get("content", "")
-        if category not in data:
-            data[category] = []
-        data[category].append(content)
-        save_brain(data)
+        brain_store().append(OPERATING_LOGIC_KEY + [category], content)
         return {"status": "success", "message": "Insight added successfully."}
     elif action == "fetch_insights":
         category = params.get("input", "")
         insights = data.get(category, [])
         return {"status": "success", "insights": insights} if insights else {"status": "error", "message": "No insights found."}
+    elif action == "semantic_search":
+        # Search across every category; each insight is embedded together with its category name
+        flattened = [
+            (category, insight)
+            for category, insights in data.items()
+            for insight in (insights if isinstance(insights, list) else [insights])
+        ]
+        texts = [f"{category}: {insight if isinstance(insight, str) else json.dumps(insight)}" for category, insight in flattened]
+        top_k = params.get("options", {}).get("top_k", 10)
+        hits = semantic_index.get_index("orchestrate_brain").search(texts, params.get("input", ""), top_k)
+        insights = [{"category": flattened[position][0], "insight": flattened[position][1], "score": score} for position, score in hits]
+        return {"status": "success", "insights": insights} if insights else {"status": "error", "message": "No insights found."}
     else:
         return {"status": "error", "message": "Invalid action or missing parameters."}
 
 def main():
     parser = argparse.ArgumentParser(description="Orchestrate Brain Tool")
-    parser.add_argument("action", choices=["add_insight", "fetch_insights"], help="Action to perform")
+    parser.add_argument("action", choices=["add_insight", "fetch_insights", "semantic_search"], help="Action to perform")
     parser.add_argument("--params", type=str, required=True, help="JSON-encoded parameters")
     args = parser.parse_args()
     
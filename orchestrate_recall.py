@@ -3,8 +3,16 @@ import os
 import argparse
 from datetime import datetime
 
+import json_store
+import recall_index
+import semantic_index
+
 RECALL_FILE = "orchestrate_recall.json"
 
+def recall_store():
+    """Journaled store behind the recall file."""
+    return json_store.get_store(RECALL_FILE, {"entries": []})
+
 def ensure_recall_file():
     """Ensure the recall file exists."""
     if not os.path.exists(RECALL_FILE):
@@ -12,14 +20,12 @@ def ensure_recall_file():
             json.dump({"entries": []}, f)
 
 def read_recall():
-    """Read entries from the recall file."""
-    with open(RECALL_FILE, "r") as f:
-        return json.load(f)
+    """Read entries from the recall file (snapshot plus journal)."""
+    return recall_store().read()
 
-def write_recall(data):
-    """Write entries to the recall file."""
-    with open(RECALL_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+def search_index():
+    """Full-text index over the recall entries, built from the file the first time it's needed."""
+    return recall_index.get_index(lambda: read_recall()["entries"])
 
 def add_entry(content, context=None):
     """Add an entry to Orchestrate Recall."""
@@ -30,21 +36,37 @@ def add_entry(content, context=None):
         "context": context or "General"
     }
     
-    data = read_recall()
-    data["entries"].append(entry)
-    write_recall(data)
+    # Open (and, the first time, backfill) the index before appending, or the backfill would pick up this entry too
+    index = search_index()
+    recall_store().append(["entries"], entry)
+    index.add(entry)
     
     return {"status": "success", "message": "✅ Entry added to Orchestrate Recall."}
 
-def search_entries(keyword):
-    """Search for entries containing the given keyword."""
+def search_entries(keyword, context=None, limit=recall_index.DEFAULT_LIMIT, match="all"):
+    """Search entries by terms and "quoted phrases", best matches first."""
     ensure_recall_file()
     
-    data = read_recall()
-    matches = [entry for entry in data["entries"] if keyword.lower() in entry["content"].lower()]
+    matches = search_index().search(keyword, context=context, limit=limit, match=match)
     
     return matches if matches else {"status": "error", "message": "No matches found."}
 
+def semantic_search(query, limit=recall_index.DEFAULT_LIMIT):
+    """Search entries by meaning rather than exact terms."""
+    ensure_recall_file()
+    
+    entries = read_recall()["entries"]
+    hits = semantic_index.get_index("orchestrate_recall").search([entry["content"] for entry in entries], query, limit)
+    matches = [{**entries[position], "score": score} for position, score in hits]
+    
+    return matches if matches else {"status": "error", "message": "No matches found."}
+
+def reindex_entries():
+    """Rebuild the search index from the recall file."""
+    ensure_recall_file()
+    count = search_index().rebuild(read_recall()["entries"])
+    return {"status": "success", "message": f"✅ Indexed {count} entries."}
+
 def show_all_entries():
     """Return all entries from Orchestrate Recall."""
     ensure_recall_file()
@@ -52,7 +74,7 @@ def show_all_entries():
 
 def main():
     parser = argparse.ArgumentParser(description="Orchestrate Recall Tool")
-    parser.add_argument("action", choices=["add_entry", "search_entries", "show_all_entries"], help="Action to perform")
+    parser.add_argument("action", choices=["add_entry", "search_entries", "show_all_entries", "semantic_search", "reindex_entries"], help="Action to perform")
     parser.add_argument("--params", type=str, help="JSON-encoded parameters for the action")
 
     args = parser.parse_args()
@@ -61,9 +83,18 @@ def main():
     if args.action == "add_entry":
         result = add_entry(params.get("content", ""), params.get("context", "General"))
     elif args.action == "search_entries":
-        result = search_entries(params.get("keyword", ""))
+        result = search_entries(
+            params.get("keyword", ""),
+            context=params.get("context"),
+            limit=params.get("limit", recall_index.DEFAULT_LIMIT),
+            match=params.get("match", "all")
+        )
+    elif args.action == "semantic_search":
+        result = semantic_search(params.get("keyword", ""), limit=params.get("limit", recall_index.DEFAULT_LIMIT))
     elif args.action == "show_all_entries":
         result = show_all_entries()
+    elif args.action == "reindex_entries":
+        result = reindex_entries()
     else:
         result = {"status": "error", "message": "Invalid action."}
     
@@ -1,79 +1,157 @@
 from fastapi import FastAPI, HTTPException, Request
-import subprocess
-import json
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import math
 import os
 import logging
 
+import http_client
+import result_cache
+import task_queue
+import tool_registry
+import tool_runtime
+import worker_pool
+
 app = FastAPI()
 
-# Tool configuration files
-ORCHESTRATE_TOOLS_PATH = "orchestrate_tools.json"  # ✅ Execution only from here
-LOAD_SKILLS_FILES = [
-    "orchestrate_marketplace.json",
-    "orchestrate_brain.json",
-    "orchestrate_recall.json"
-]  # ✅ Load these for skill availability
+# "in_process" imports each tool once and calls it directly; "pool" keeps warm isolated
+# workers per tool; "subprocess" spawns python3 per call. Tools override with "execution".
+EXECUTION_MODE = os.getenv("ORCHESTRATE_EXECUTION_MODE", "in_process")
+
+# 🔥 Concurrency limits. Tools override with "max_concurrency" and "timeout" in orchestrate_tools.json
+EXECUTOR_WORKERS = int(os.getenv("ORCHESTRATE_EXECUTOR_WORKERS", "32"))  # Threads for in-process/pool calls
+DEFAULT_TOOL_CONCURRENCY = int(os.getenv("ORCHESTRATE_TOOL_CONCURRENCY", "8"))  # In-flight calls per tool
+DEFAULT_TIMEOUT = float(os.getenv("ORCHESTRATE_TOOL_TIMEOUT", "300"))  # Seconds per request
+DISCONNECT_POLL_INTERVAL = 0.5
+BATCH_CONCURRENCY = int(os.getenv("ORCHESTRATE_BATCH_CONCURRENCY", "10"))  # Default items in flight per batch
+MAX_BATCH_SIZE = 200
+QUEUE_WORKERS = int(os.getenv("ORCHESTRATE_QUEUE_WORKERS", "0"))  # In-server consumers; 0 leaves it to the daemon
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-def load_skills():
-    """Loads skills from marketplace, brain, and recall files."""
-    merged_skills = {"skills": {}}
+# ✅ Tools and skills are parsed once and reloaded only when their files change
+registry = tool_registry.get_registry()
 
-    for file_path in LOAD_SKILLS_FILES:
-        if os.path.exists(file_path):
-            try:
-                with open(file_path, "r") as file:
-                    data = json.load(file)
-                    if "skills" in data:
-                        merged_skills["skills"].update(data["skills"])
-            except json.JSONDecodeError:
-                logging.error(f"🚨 ERROR: Failed to parse {file_path}. Skipping.")
+executor = ThreadPoolExecutor(max_workers=EXECUTOR_WORKERS, thread_name_prefix="tool")
+tool_semaphores = {}
 
-    return merged_skills
+def get_tool_semaphore(tool_name, tool):
+    """Returns the semaphore capping concurrent calls to one tool."""
+    if tool_name not in tool_semaphores:
+        tool_semaphores[tool_name] = asyncio.Semaphore(tool.get("max_concurrency", DEFAULT_TOOL_CONCURRENCY))
+    return tool_semaphores[tool_name]
 
-def load_toolstack():
-    """Loads tools ONLY from orchestrate_tools.json (for execution)."""
-    if not os.path.exists(ORCHESTRATE_TOOLS_PATH):
-        logging.error(f"🚨 ERROR: {ORCHESTRATE_TOOLS_PATH} not found.")
-        return {"tools": {}}
+def run_blocking(tool_name, tool, script_path, action, params, mode, timeout):
+    """Runs an in-process or pooled tool call on an executor thread.
 
-    try:
-        with open(ORCHESTRATE_TOOLS_PATH, "r") as file:
-            return json.load(file)
-    except json.JSONDecodeError:
-        logging.error(f"🚨 ERROR: Failed to parse {ORCHESTRATE_TOOLS_PATH}.")
-        return {"tools": {}}
+    Returns None when the tool can't run in-process and should fall back to a subprocess.
+    """
+    # Checked here rather than on the event loop, since the first check imports the tool module.
+    # main()-only tools own sys.argv and stdout while they run, so they get isolated warm workers.
+    if mode == "in_process" and not tool_runtime.has_execute_action(tool_name, script_path):
+        mode = "pool"
 
-def run_script(tool_name, action, params):
-    """Runs a tool dynamically based on orchestrate_tools.json."""
-    tools = load_toolstack().get("tools", {})
+    if mode == "pool":
+        try:
+            return worker_pool.get_manager().execute(
+                tool_name, script_path, action, params, config=tool.get("pool"), timeout=timeout
+            )
+        except worker_pool.WorkerError as e:
+            return {"error": "Script execution failed", "details": str(e)}
+
+    if mode == "in_process":
+        return tool_runtime.run_in_process(tool_name, script_path, action, params)
+    return None
+
+def number_field(data, key, default, cast=float):
+    """Reads a numeric request field, answering 400 instead of a 500 when it isn't a finite number."""
+    value = data.get(key)
+    if value is None:
+        return default
+    try:
+        number = cast(value)
+    except (TypeError, ValueError, OverflowError):
+        raise HTTPException(status_code=400, detail=f"'{key}' must be a number.")
+    if not math.isfinite(number):
+        raise HTTPException(status_code=400, detail=f"'{key}' must be a finite number.")
+    return number
 
-    logging.info(f"🚨 DEBUG: Loaded execution tools: {list(tools.keys())}")
+async def run_script(tool_name, action, params, timeout=None, use_cache=True):
+    """Runs a tool dynamically based on orchestrate_tools.json without blocking the event loop."""
+    tool = registry.get_tool(tool_name)
 
-    if tool_name not in tools:
+    if tool is None:
         logging.error(f"🚨 ERROR: Tool '{tool_name}' not found in execution list.")
         return {"error": f"Tool '{tool_name}' not found."}
 
-    script_path = tools[tool_name].get("path")
+    script_path = tool.get("path")
 
     if not script_path or not os.path.isfile(script_path):
         logging.error(f"🚨 ERROR: Script file does not exist at {script_path}.")
         return {"error": f"Script for '{tool_name}' not found."}
 
-    params_json = json.dumps(params)
+    mode = tool.get("execution", EXECUTION_MODE)
+    timeout = timeout or tool.get("timeout", DEFAULT_TIMEOUT)
 
-    try:
-        result = subprocess.run(
-            ["python3", script_path, action, "--params", params_json],
-            capture_output=True,
-            text=True,
-            check=True
+    ttl = result_cache.cache_ttl(tool_name, action, tool) if use_cache else 0
+    if ttl:
+        cache_key = result_cache.make_key(tool_name, action, params)
+        hit, cached = result_cache.get_cache().get(cache_key)
+        if hit:
+            logging.info(f"🚨 DEBUG: Cache hit for {tool_name} -> {action}")
+            return cached
+
+    async with get_tool_semaphore(tool_name, tool):
+        try:
+            response = await asyncio.wait_for(
+                _dispatch(tool_name, tool, script_path, action, params, mode, timeout), timeout
+            )
+        except asyncio.TimeoutError:
+            logging.error(f"🚨 ERROR: '{tool_name}' -> {action} timed out after {timeout}s")
+            return {"error": "Script execution timed out", "details": f"'{tool_name}' exceeded {timeout}s."}
+
+    if ttl and result_cache.is_cacheable_result(response):
+        result_cache.get_cache().set(cache_key, tool_name, response, ttl)
+    return response
+
+async def _dispatch(tool_name, tool, script_path, action, params, mode, timeout):
+    if mode in ("in_process", "pool"):
+        # Executor threads can't be interrupted; a timed-out in-process call finishes in the background.
+        # Slow tools should set "execution": "pool" or "subprocess", where a timeout kills the worker.
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(
+            executor, functools.partial(run_blocking, tool_name, tool, script_path, action, params, mode, timeout)
         )
-        return json.loads(result.stdout.strip())
-    except subprocess.CalledProcessError as e:
-        return {"error": "Script execution failed", "details": e.stderr.strip()}
+        if result is not None:
+            return result
+        logging.info(f"🚨 DEBUG: Falling back to subprocess for '{tool_name}'")
+
+    return await tool_runtime.run_subprocess_async(script_path, action, params)
+
+async def cancel_on_disconnect(request, task):
+    """Cancels a running tool call if the client goes away before it finishes."""
+    while not task.done():
+        if await request.is_disconnected():
+            logging.info("🚨 DEBUG: Client disconnected. Cancelling tool execution.")
+            task.cancel()
+            return True
+        await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+    return False
+
+async def run_until_disconnect(request, coro):
+    """Awaits coro, cancelling it and answering 499 if the client disconnects first."""
+    task = asyncio.ensure_future(coro)
+    watcher = asyncio.ensure_future(cancel_on_disconnect(request, task))
+    try:
+        return await task
+    except asyncio.CancelledError:
+        if watcher.done() and not watcher.cancelled() and watcher.result():
+            raise HTTPException(status_code=499, detail="Client disconnected.")
+        raise
+    finally:
+        watcher.cancel()
 
 @app.post("/execute_task")
 async def execute_task(request: Request):
@@ -90,9 +168,141 @@ async def execute_task(request: Request):
         raise HTTPException(status_code=400, detail="Missing tool_name or action.")
 
     logging.info(f"🚨 DEBUG: Executing {tool_name} -> {action} with params: {params}")
-    response = run_script(tool_name, action, params)
-    if "error" in response:
+    response = await run_until_disconnect(
+        request, run_script(tool_name, action, params, number_field(request_data, "timeout", None), request_data.get("cache", True))
+    )
+
+    if isinstance(response, dict) and "error" in response:
         logging.error(f"🚨 ERROR: Execution failed: {response}")
+        if response.get("error") == "Script execution timed out":
+            raise HTTPException(status_code=504, detail=response)
         raise HTTPException(status_code=500, detail=response)
     
     return response
+
+async def run_batch_item(item):
+    """Runs one batch item and wraps its outcome with a per-item status."""
+    if not isinstance(item, dict) or not item.get("tool_name") or not item.get("action"):
+        return {"status": "error", "error": "Missing tool_name or action."}
+    try:
+        timeout = number_field(item, "timeout", None)
+    except HTTPException as e:
+        return {"status": "error", "error": e.detail}
+
+    response = await run_script(
+        item["tool_name"], item["action"], item.get("params", {}), timeout, item.get("cache", True)
+    )
+    if isinstance(response, dict) and "error" in response:
+        return {"status": "error", "error": response}
+    return {"status": "success", "result": response}
+
+async def run_batch(items, order, max_concurrency):
+    """Runs items concurrently, or one at a time in the given order of indices."""
+    if order is not None:
+        results = {}
+        for index in order:
+            results[index] = await run_batch_item(items[index])
+        return results
+
+    limit = asyncio.Semaphore(max_concurrency)
+
+    async def run_limited(item):
+        async with limit:
+            return await run_batch_item(item)
+
+    outcomes = await asyncio.gather(*(run_limited(item) for item in items))
+    return dict(enumerate(outcomes))
+
+@app.post("/execute_batch")
+async def execute_batch(request: Request):
+    """Executes many tool actions in one request and returns results keyed by item index."""
+    request_data = await request.json()
+    items = request_data.get("items")
+
+    if not isinstance(items, list) or not items:
+        raise HTTPException(status_code=400, detail="'items' must be a non-empty list.")
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Batches are limited to {MAX_BATCH_SIZE} items.")
+
+    order = request_data.get("order")
+    if order is not None and (
+        not isinstance(order, list)
+        or not all(isinstance(index, int) for index in order)
+        or sorted(order) != list(range(len(items)))
+    ):
+        raise HTTPException(status_code=400, detail="'order' must list every item index exactly once.")
+
+    max_concurrency = max(1, number_field(request_data, "max_concurrency", BATCH_CONCURRENCY, cast=int))
+    logging.info(f"🚨 DEBUG: Executing batch of {len(items)} items (order={order}, max_concurrency={max_concurrency})")
+
+    results = await run_until_disconnect(request, run_batch(items, order, max_concurrency))
+    failed = sum(1 for outcome in results.values() if outcome["status"] == "error")
+
+    return {
+        "status": "success" if not failed else "partial" if failed < len(items) else "error",
+        "succeeded": len(items) - failed,
+        "failed": failed,
+        "results": {str(index): results[index] for index in sorted(results)}
+    }
+
+@app.post("/enqueue_task")
+async def enqueue_task(request: Request):
+    """Adds a tool action to the durable task queue and returns its task id."""
+    request_data = await request.json()
+    tool_name = request_data.get("tool_name")
+    action = request_data.get("action")
+
+    if not tool_name or not action:
+        raise HTTPException(status_code=400, detail="Missing tool_name or action.")
+
+    task_id = task_queue.get_queue().enqueue(
+        tool_name,
+        action,
+        request_data.get("params", {}),
+        max_attempts=number_field(request_data, "max_attempts", task_queue.MAX_ATTEMPTS, cast=int),
+        delay=number_field(request_data, "delay", 0)
+    )
+    return {"status": "success", "task_id": task_id}
+
+@app.get("/queue_status")
+async def queue_status():
+    """Reports how many queued tasks are in each status."""
+    return {"status": "success", "counts": task_queue.get_queue().counts()}
+
+@app.get("/queue_status/{task_id}")
+async def queued_task_status(task_id: int):
+    """Returns the state, attempts and result of one queued task."""
+    task = task_queue.get_queue().get(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail=f"Task {task_id} not found.")
+    return task
+
+@app.get("/registry")
+async def registry_status():
+    """Reports the loaded tool registry version and when it was last reloaded."""
+    return registry.status()
+
+@app.get("/http_metrics")
+async def http_metrics():
+    """Reports per-host request counts, retries, errors and latency for HTTP calls made by in-process tools."""
+    return http_client.get_metrics()
+
+@app.on_event("startup")
+def start_background_services():
+    """Starts the registry watcher, the shared worker pool and any in-server queue workers."""
+    worker_pool.get_manager()
+    registry.start_watching()
+    if QUEUE_WORKERS:
+        app.state.queue_workers = task_queue.QueueWorkers(task_queue.get_queue(), QUEUE_WORKERS)
+        app.state.queue_workers.start()
+
+@app.on_event("shutdown")
+def stop_background_services():
+    """Stops the registry watcher, queue workers and pooled tool workers when the server exits."""
+    registry.stop_watching()
+    if getattr(app.state, "queue_workers", None):
+        app.state.queue_workers.stop(timeout=5)
+    manager = worker_pool.get_manager(create=False)
+    if manager:
+        manager.shutdown()
+    executor.shutdown(wait=False)
@@ -2,10 +2,21 @@ import os
 import logging
 import subprocess
 import json
-import requests
+import hashlib
+import shutil
+import threading
+import time
+import concurrent.futures
+import dropbox_tool_no_creds
 
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
 
+CHECKPOINT_DIR = "podcast_cover_checkpoints"
+BACKGROUND_WORKERS = 2      # Background generations running at once in create_covers
+EPISODE_WORKERS = 4         # Episodes in flight at once in create_covers
+LINK_MAX_AGE = 3 * 3600     # Dropbox temporary links last 4 hours; reuse a checkpointed one for 3
+STAGES = ["background", "render", "link"]
+
 class PodcastCoverTool:
     def __init__(self, config=None):
         """
@@ -17,13 +28,21 @@ class PodcastCoverTool:
         self.assets_path = "/Users/srinivas/Library/CloudStorage/Dropbox/2. Areas of Responsibility/Unmistkable Creative/1.Podcast/Covers/Assets/"
         self.finished_covers_path = "/Users/srinivas/Library/CloudStorage/Dropbox/2. Areas of Responsibility/Unmistkable Creative/1.Podcast/Covers/Finished Covers/"
         self.dropbox_root_path = "/2. Areas of Responsibility/Unmistkable Creative/1.Podcast/Covers/Finished Covers/"  # Relative to Dropbox root
+        self.checkpoint_dir = self.config.get("checkpoint_dir", CHECKPOINT_DIR)
+        # Photoshop renders one document at a time; background generation can overlap it
+        self._render_lock = threading.Lock()
+        self._background_slots = threading.Semaphore(self.config.get("background_workers", BACKGROUND_WORKERS))
+        # The scripts read and write one {guest}-bg.jpg / {guest}-cover.jpg, so a guest's episodes take turns with them
+        self._guest_locks = {}
+        self._guest_locks_lock = threading.Lock()
 
     def get_supported_actions(self):
         """
         Returns the list of supported actions.
         """
         return {
-            "create_cover": ["guest_name", "episode_title", "custom_prompt"]
+            "create_cover": ["guest_name", "episode_title", "custom_prompt"],
+            "create_covers": ["episodes"]
         }
 
     def execute(self, action, params):
@@ -33,6 +52,9 @@ class PodcastCoverTool:
         if action == "get_supported_actions":
             return self.get_supported_actions()
 
+        if action == "create_covers":
+            return self.create_covers(params.get("episodes", []))
+
         if action != "create_cover":
             raise ValueError(f"Unsupported action: {action}")
 
@@ -43,32 +65,136 @@ class PodcastCoverTool:
         if not guest_name or not episode_title:
             raise ValueError("'guest_name' and 'episode_title' are required.")
 
-        logging.info(f"Generating podcast cover for guest: {guest_name}, title: {episode_title}")
+        checkpoint = self.produce_cover(guest_name, episode_title, custom_prompt)
+        return {
+            "status": "success",
+            "message": "Podcast cover created successfully.",
+            "cover_markdown": checkpoint["link"]["markdown"],
+        }
+
+    def create_covers(self, episodes):
+        """
+        Produces covers for many episodes. Each episode moves through background -> render -> link
+        on its own thread, so one episode's background generation overlaps another's Photoshop render.
+        """
+        if not isinstance(episodes, list) or not episodes:
+            raise ValueError("'episodes' must be a non-empty list.")
+
+        results = [None] * len(episodes)
+        workers = min(len(episodes), self.config.get("episode_workers", EPISODE_WORKERS))
+        with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+            futures = {}
+            for index, episode in enumerate(episodes):
+                if not episode.get("guest_name") or not episode.get("episode_title"):
+                    results[index] = {"status": "error", "message": "'guest_name' and 'episode_title' are required."}
+                    continue
+                future = executor.submit(
+                    self.produce_cover, episode["guest_name"], episode["episode_title"], episode.get("custom_prompt")
+                )
+                futures[future] = index
 
-        # Step 1: Generate Background
-        background_path = self.generate_background(guest_name, episode_title, custom_prompt)
-        if not os.path.exists(background_path):
-            raise FileNotFoundError(f"Background image not found: {background_path}")
+            for future in concurrent.futures.as_completed(futures):
+                index = futures[future]
+                guest_name = episodes[index]["guest_name"]
+                try:
+                    checkpoint = future.result()
+                    results[index] = {"guest_name": guest_name, "status": "success", "cover_markdown": checkpoint["link"]["markdown"]}
+                except Exception as e:
+                    logging.error(f"❌ Cover for {guest_name} failed: {e}")
+                    results[index] = {"guest_name": guest_name, "status": "error", "message": str(e)}
 
-        # Step 2: Run Photoshop JSX Script
-        self.run_photoshop_jsx(guest_name)
+        failed = sum(1 for result in results if result["status"] != "success")
+        status = "success" if not failed else ("partial" if failed < len(results) else "error")
+        return {"status": status, "covers": results}
 
-        # Step 3: Generate Temporary Link for Finished Cover
+    def run_key(self, guest_name, prompt):
+        """
+        Checkpoints and artifacts are keyed by guest and prompt hash, so a new prompt starts a fresh run
+        and two episodes for the same guest never share files.
+        """
         formatted_guest_name = guest_name.lower().replace(" ", "-")
-        local_cover_path = os.path.join(self.finished_covers_path, f"{formatted_guest_name}-cover.jpg")
-        dropbox_relative_path = os.path.join(self.dropbox_root_path, f"{formatted_guest_name}-cover.jpg")
+        prompt_hash = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:12]
+        return f"{formatted_guest_name}-{prompt_hash}"
 
-        if not os.path.exists(local_cover_path):
-            raise FileNotFoundError(f"Finished cover not found: {local_cover_path}")
+    def checkpoint_path(self, guest_name, prompt):
+        return os.path.join(self.checkpoint_dir, f"{self.run_key(guest_name, prompt)}.json")
 
-        # Generate the temporary link using the relative Dropbox path
-        markdown_link = self.generate_temporary_link(dropbox_relative_path, formatted_guest_name)
+    def guest_lock(self, formatted_guest_name):
+        with self._guest_locks_lock:
+            return self._guest_locks.setdefault(formatted_guest_name, threading.Lock())
 
-        return {
-            "status": "success",
-            "message": "Podcast cover created successfully.",
-            "cover_markdown": markdown_link,
-        }
+    def load_checkpoint(self, path):
+        try:
+            with open(path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save_checkpoint(self, path, checkpoint):
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def stage_done(self, stage, checkpoint):
+        """
+        A stage counts as done if it was checkpointed and its artifact is still usable.
+        """
+        done = checkpoint.get(stage)
+        if not done:
+            return False
+        if stage == "link":
+            return time.time() - done["created_at"] < LINK_MAX_AGE
+        return os.path.exists(done["path"])
+
+    def produce_cover(self, guest_name, episode_title, custom_prompt=None):
+        """
+        Runs the three cover stages for one episode, skipping any already checkpointed.
+        Once a stage re-runs, the stages after it re-run too, since their inputs changed.
+        """
+        formatted_guest_name = guest_name.lower().replace(" ", "-")
+        prompt = custom_prompt if custom_prompt else self.get_default_prompt(guest_name, episode_title)
+        run_key = self.run_key(guest_name, prompt)
+        path = self.checkpoint_path(guest_name, prompt)
+        guest_lock = self.guest_lock(formatted_guest_name)
+        checkpoint = self.load_checkpoint(path)
+        rerun = False
+
+        for stage in STAGES:
+            if not rerun and self.stage_done(stage, checkpoint):
+                logging.info(f"⏭️ {guest_name}: {stage} already done, skipping.")
+                continue
+            rerun = True
+
+            if stage == "background":
+                background_path = os.path.join(self.assets_path, f"{run_key}-bg.jpg")
+                with self._background_slots, guest_lock:
+                    script_output = self.generate_background(guest_name, episode_title, prompt)
+                    if not os.path.exists(script_output):
+                        raise FileNotFoundError(f"Background image not found: {script_output}")
+                    os.replace(script_output, background_path)
+                checkpoint[stage] = {"path": background_path}
+            elif stage == "render":
+                local_cover_path = os.path.join(self.finished_covers_path, f"{run_key}-cover.jpg")
+                script_output = os.path.join(self.finished_covers_path, f"{formatted_guest_name}-cover.jpg")
+                with guest_lock, self._render_lock:
+                    # The JSX reads the guest's background, so hand it this run's copy
+                    shutil.copyfile(checkpoint["background"]["path"], os.path.join(self.assets_path, f"{formatted_guest_name}-bg.jpg"))
+                    self.run_photoshop_jsx(guest_name)
+                    if not os.path.exists(script_output):
+                        raise FileNotFoundError(f"Finished cover not found: {script_output}")
+                    os.replace(script_output, local_cover_path)
+                checkpoint[stage] = {"path": local_cover_path}
+            else:
+                dropbox_relative_path = os.path.join(self.dropbox_root_path, f"{run_key}-cover.jpg")
+                markdown_link = self.generate_temporary_link(dropbox_relative_path, formatted_guest_name)
+                checkpoint[stage] = {"markdown": markdown_link, "created_at": time.time()}
+
+            self.save_checkpoint(path, checkpoint)
+            logging.info(f"✅ {guest_name}: {stage} done.")
+
+        return checkpoint
 
     def get_default_prompt(self, guest_name, episode_title):
         """
@@ -121,27 +247,13 @@ class PodcastCoverTool:
     def generate_temporary_link(self, relative_path, formatted_guest_name):
         """
         Generates a temporary Dropbox link for the final podcast cover.
+        The Dropbox metadata index answers whether the cover has synced yet and reuses unexpired links.
         """
-        skillstack_path = "/Users/srinirao/Orchestrate-GitHub/sandbox-abstraction/skillstack.json"
-        if not os.path.exists(skillstack_path):
-            raise FileNotFoundError(f"Skillstack file not found: {skillstack_path}")
-
-        with open(skillstack_path, "r") as file:
-            skillstack = json.load(file)
-        
-        api_key = skillstack.get("tools", {}).get("dropbox_tool", {}).get("config", {}).get("api_key")
-        if not api_key:
-            raise ValueError("Dropbox API key not found in skillstack.")
-
-        url = "https://api.dropboxapi.com/2/files/get_temporary_link"
-        headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-        data = {"path": relative_path}
-
-        response = requests.post(url, headers=headers, json=data)
-        if response.status_code != 200:
-            raise RuntimeError(f"Failed to generate Dropbox link: {response.text}")
+        result = dropbox_tool_no_creds.generate_temporary_link(relative_path)
+        if result.get("status") != "success":
+            raise RuntimeError(f"Failed to generate Dropbox link: {result.get('message')}")
 
-        temporary_link = response.json().get("link")
+        temporary_link = result["link"]
         markdown_link = f"![Podcast Cover for {formatted_guest_name}]({temporary_link})"
         logging.info(f"Generated Markdown Link: {markdown_link}")
         return markdown_link
@@ -0,0 +1,154 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import recall_index
+
+READWISE_DB = "readwise.db"
+BOOKS_FILE = "readwise_books.json"  # Old book cache, imported once when the database is first created
+
+BOOK_COLUMNS = ["id", "title", "author", "category", "source", "num_highlights", "updated"]
+HIGHLIGHT_COLUMNS = ["id", "book_id", "text", "note", "location", "highlighted_at", "updated"]
+
+
+class ReadwiseStore:
+    """Local SQLite mirror of Readwise books and highlights, with full-text search over highlights.
+
+    Sync cursors (the newest "updated" value seen per resource) live in the meta table, so
+    each sync only asks Readwise for what changed since the last one.
+    """
+
+    def __init__(self, db_path=READWISE_DB, import_file=BOOKS_FILE):
+        self.db_path = db_path
+        self._local = threading.local()
+        is_new = not os.path.exists(db_path)
+        conn = self._db()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS books ("
+                "id INTEGER PRIMARY KEY, title TEXT, author TEXT, category TEXT, source TEXT, "
+                "num_highlights INTEGER, updated TEXT, data TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_books_title ON books(title COLLATE NOCASE)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS highlights ("
+                "id INTEGER PRIMARY KEY, book_id INTEGER, text TEXT, note TEXT, location INTEGER, "
+                "highlighted_at TEXT, updated TEXT, data TEXT NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_highlights_book ON highlights(book_id, location)")
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS highlights_fts USING fts5("
+                "text, note, content='highlights', content_rowid='id', tokenize='porter unicode61')"
+            )
+            # Keep the external-content FTS table in step with highlights
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS highlights_ai AFTER INSERT ON highlights BEGIN "
+                "INSERT INTO highlights_fts(rowid, text, note) VALUES (new.id, new.text, new.note); END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS highlights_ad AFTER DELETE ON highlights BEGIN "
+                "INSERT INTO highlights_fts(highlights_fts, rowid, text, note) VALUES ('delete', old.id, old.text, old.note); END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS highlights_au AFTER UPDATE ON highlights BEGIN "
+                "INSERT INTO highlights_fts(highlights_fts, rowid, text, note) VALUES ('delete', old.id, old.text, old.note); "
+                "INSERT INTO highlights_fts(rowid, text, note) VALUES (new.id, new.text, new.note); END"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        if is_new and import_file and os.path.exists(import_file):
+            with open(import_file, "r") as f:
+                self.upsert_books(json.load(f))
+
+    def _db(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _upsert(self, table, columns, records):
+        """Inserts or replaces records by id. Returns the newest "updated" value among them."""
+        assignments = ", ".join(f"{column} = excluded.{column}" for column in columns[1:] + ["data"])
+        conn = self._db()
+        with conn:
+            conn.executemany(
+                f"INSERT INTO {table} ({', '.join(columns)}, data) VALUES ({', '.join('?' * (len(columns) + 1))}) "
+                f"ON CONFLICT(id) DO UPDATE SET {assignments}",
+                [[record.get(column) for column in columns] + [json.dumps(record)] for record in records]
+            )
+        return max((record.get("updated") or "" for record in records), default="") or None
+
+    def upsert_books(self, books):
+        return self._upsert("books", BOOK_COLUMNS, books)
+
+    def upsert_highlights(self, highlights):
+        return self._upsert("highlights", HIGHLIGHT_COLUMNS, highlights)
+
+    def get_meta(self, key):
+        row = self._db().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def set_meta(self, key, value):
+        conn = self._db()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def advance_cursor(self, resource, updated):
+        """Moves a resource's sync cursor forward (never back) and records when it last synced."""
+        current = self.get_meta(f"{resource}_cursor")
+        if updated and (current is None or updated > current):
+            self.set_meta(f"{resource}_cursor", updated)
+        self.set_meta(f"{resource}_synced_at", str(time.time()))
+
+    def synced_at(self, resource):
+        value = self.get_meta(f"{resource}_synced_at")
+        return float(value) if value else None
+
+    def count_books(self):
+        return self._db().execute("SELECT COUNT(*) FROM books").fetchone()[0]
+
+    def find_book(self, title):
+        """Case-insensitive exact title lookup through the NOCASE index."""
+        row = self._db().execute(
+            "SELECT data FROM books WHERE title = ? COLLATE NOCASE ORDER BY updated DESC LIMIT 1", (title,)
+        ).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def get_highlights(self, book_id, limit=None, offset=0):
+        rows = self._db().execute(
+            "SELECT data FROM highlights WHERE book_id = ? ORDER BY location, id LIMIT ? OFFSET ?",
+            (book_id, -1 if limit is None else limit, offset)
+        ).fetchall()
+        return [json.loads(row["data"]) for row in rows]
+
+    def search_highlights(self, query, book_id=None, limit=recall_index.DEFAULT_LIMIT):
+        """Full-text search over highlight text and notes, best BM25 match first."""
+        match_query = recall_index.build_match_query(query)
+        if not match_query:
+            return []
+        sql = (
+            "SELECT h.data FROM highlights_fts JOIN highlights h ON h.id = highlights_fts.rowid "
+            "WHERE highlights_fts MATCH ?"
+        )
+        args = [match_query]
+        if book_id is not None:
+            sql += " AND h.book_id = ?"
+            args.append(book_id)
+        sql += " ORDER BY bm25(highlights_fts) LIMIT ?"
+        args.append(limit)
+        return [json.loads(row["data"]) for row in self._db().execute(sql, args).fetchall()]
+
+
+_store = None
+
+
+def get_store():
+    """Returns the process-wide Readwise mirror, creating (and importing into) it on first use."""
+    global _store
+    if _store is None:
+        _store = ReadwiseStore(os.getenv("READWISE_DB", READWISE_DB))
+    return _store
@@ -1,65 +1,191 @@
 import requests
+import concurrent.futures
 import json
+import logging
+import math
 import os
+import time
 import argparse
 
+import http_client
+import readwise_store
+
 # Constants
 BASE_URL = "https://readwise.io/api/v2"
-CACHE_FILE = "/Users/srinivas/Orchestrate Github/orchestrate-execution/readwise_books.json"
+MAX_PAGE_SIZE = 1000            # Readwise's maximum
+HIGHLIGHTS_PAGE_SIZE = MAX_PAGE_SIZE
+HIGHLIGHTS_MAX_AGE = 900        # Seconds before fetch_highlights pulls highlight changes again
+SYNC_WORKERS = 4                # Pages fetched concurrently once the first page reports the total count
+SYNC_PASSES = 3                 # Passes tried before giving up on a listing that keeps changing
+REQUEST_TIMEOUT = 30            # Seconds per page request
+MAX_RETRIES = 5                 # Retries per page on 429 / 5xx (Readwise rate limits per minute)
+
+class ReadwiseError(Exception):
+    def __init__(self, message, response_text=None):
+        super().__init__(message)
+        self.response_text = response_text
+
+def get_page(api_key, resource, params):
+    """GETs one page of a resource, waiting out rate limits. Returns the decoded JSON."""
+    response = http_client.get(
+        f"{BASE_URL}/{resource}/", headers={"Authorization": f"Token {api_key}"}, params=params,
+        timeout=REQUEST_TIMEOUT, retries=MAX_RETRIES
+    )
+    if response.status_code != 200:
+        raise ReadwiseError(f"Failed to fetch {resource}: {response.status_code}", response.text)
+    return response.json()
 
 def get_supported_actions():
     return {
-        "fetch_books": ["page_size"],
-        "fetch_highlights": ["book_title"]
+        "fetch_books": ["page_size", "full"],
+        "fetch_highlights": ["book_title", "refresh"],
+        "search_highlights": ["query", "book_title", "limit"],
+        "sync": ["full"]
     }
 
-def fetch_books(api_key, page_size=50):
-    """Fetches books from Readwise and caches them locally."""
-    headers = {"Authorization": f"Token {api_key}"}
-    books = []
-    next_url = f"{BASE_URL}/books/"
-
-    while next_url:
-        response = requests.get(next_url, headers=headers, params={"category": "books", "page_size": page_size})
-        if response.status_code == 200:
-            data = response.json()
-            books.extend(data.get("results", []))
-            next_url = data.get("next")
+def sync_resource(api_key, resource, params, full=False, key=None):
+    """Pulls one resource ("books" or "highlights") into the local mirror.
+
+    Only records updated after the stored cursor are requested unless full=True. The cursor is
+    stored under key (default: the resource name), so a filtered sync keeps a cursor of its own.
+    Page 1 gives the total count; the remaining pages are fetched SYNC_WORKERS at a time and each
+    one is written to the store as it arrives, so memory stays flat.
+
+    Page numbers shift if records change while the pages are fetched, which can skip a record.
+    A pass only counts as consistent if every page reported the same count and that many distinct
+    records arrived; otherwise it is repeated, up to SYNC_PASSES times. The cursor advances only
+    after a consistent pass, so anything skipped is picked up by the next sync.
+    """
+    page_size = params.get("page_size")
+    if isinstance(page_size, bool) or not isinstance(page_size, int) or not 1 <= page_size <= MAX_PAGE_SIZE:
+        return {"status": "error", "message": f"'page_size' must be an integer from 1 to {MAX_PAGE_SIZE}."}
+
+    store = readwise_store.get_store()
+    upsert = store.upsert_books if resource == "books" else store.upsert_highlights
+    key = key or resource
+    cursor = None if full else store.get_meta(f"{key}_cursor")
+    params = {**params, "updated__gt": cursor} if cursor else dict(params)
+    progress = {"newest": None, "synced": 0}
+
+    def run_pass():
+        seen, counts = set(), set()
+        progress["synced"] = 0
+
+        def store_page(data):
+            results = data.get("results", [])
+            counts.add(data.get("count"))
+            if results:
+                updated = upsert(results)
+                progress["newest"] = max(filter(None, [progress["newest"], updated]), default=None)
+                progress["synced"] += len(results)
+                seen.update(record["id"] for record in results)
+
+        first = get_page(api_key, resource, {**params, "page": 1})
+        store_page(first)
+        count = first.get("count", 0)
+        pages = math.ceil(count / page_size) if first.get("next") else 1
+
+        remaining = iter(range(2, pages + 1))
+        with concurrent.futures.ThreadPoolExecutor(SYNC_WORKERS) as executor:
+            def submit_next():
+                page = next(remaining, None)
+                if page is not None:
+                    pending.add(executor.submit(get_page, api_key, resource, {**params, "page": page}))
+
+            # Keep a bounded window of pages in flight rather than queueing them all
+            pending = set()
+            for _ in range(SYNC_WORKERS * 2):
+                submit_next()
+            while pending:
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    store_page(future.result())
+                    submit_next()
+        return counts == {count} and len(seen) == count
+
+    try:
+        for attempt in range(SYNC_PASSES):
+            if run_pass():
+                store.advance_cursor(key, progress["newest"])
+                break
+            logging.warning(f"⚠️ Readwise {resource} changed during sync pass {attempt + 1}, fetching again.")
         else:
-            return {"status": "error", "message": f"Failed to fetch books: {response.status_code}", "response": response.json()}
-
-    # Only write to file after successful retrieval
-    with open(CACHE_FILE, "w") as f:
-        json.dump(books, f, indent=2)
-
-    return {"status": "success", "message": "Books cached successfully."}
-
-def fetch_highlights(api_key, book_title):
-    """Fetches highlights for a specific book."""
-    headers = {"Authorization": f"Token {api_key}"}
-
-    # Auto-fetch books if cache is missing
-    if not os.path.exists(CACHE_FILE):
+            logging.warning(f"⚠️ Readwise {resource} kept changing; cursor left in place for the next sync.")
+    except (ReadwiseError, requests.RequestException) as e:
+        return {"status": "error", "message": str(e), "response": getattr(e, "response_text", None)}
+
+    return {"status": "success", "synced": progress["synced"]}
+
+def fetch_books(api_key, page_size=50, full=False):
+    """Syncs books changed since the last sync into the local mirror."""
+    result = sync_resource(api_key, "books", {"category": "books", "page_size": page_size}, full)
+    if result["status"] != "success":
+        return result
+    return {"status": "success", "message": f"Books cached successfully ({result['synced']} updated)."}
+
+def sync_highlights(api_key, full=False, book_id=None):
+    """Syncs every highlight in the library, or only one book's when book_id is given."""
+    params = {"page_size": HIGHLIGHTS_PAGE_SIZE}
+    if book_id is None:
+        return sync_resource(api_key, "highlights", params, full)
+    return sync_resource(api_key, "highlights", {**params, "book_id": book_id}, full, key=f"highlights_book_{book_id}")
+
+def sync(api_key, full=False):
+    """Syncs books and highlights."""
+    books = fetch_books(api_key, full=full)
+    if books["status"] != "success":
+        return books
+    highlights = sync_highlights(api_key, full)
+    if highlights["status"] != "success":
+        return highlights
+    return {"status": "success", "message": f"{books['message']} {highlights['synced']} highlights updated."}
+
+def find_book(api_key, book_title):
+    """Looks a book up in the mirror, syncing books first if it is missing."""
+    store = readwise_store.get_store()
+    book = store.find_book(book_title)
+    if book is None and api_key:
         fetch_books(api_key)
+        book = store.find_book(book_title)
+    return book
 
-    with open(CACHE_FILE, "r") as f:
-        books = json.load(f)
+def fetch_highlights(api_key, book_title, refresh=False):
+    """Returns highlights for a specific book from the local mirror.
 
-    book_id = next((b["id"] for b in books if b["title"].lower() == book_title.lower()), None)
-    if not book_id:
+    Only the sync action mirrors the whole highlight library. Until it has run, the book's own
+    highlights are fetched (by book_id) and kept fresh on their own cursor.
+    """
+    book = find_book(api_key, book_title)
+    if not book:
         return {"status": "error", "message": f"Book '{book_title}' not found in cache."}
 
-    url = f"{BASE_URL}/highlights/"
-    response = requests.get(url, headers=headers, params={"book_id": book_id})
-
-    if response.status_code == 200:
-        return {"status": "success", "highlights": response.json().get("results", [])}
-    else:
-        return {"status": "error", "message": f"Failed to fetch highlights: {response.status_code}", "response": response.json()}
+    store = readwise_store.get_store()
+    book_id = None if store.synced_at("highlights") else book["id"]
+    synced_at = store.synced_at("highlights" if book_id is None else f"highlights_book_{book_id}")
+    if refresh or synced_at is None or time.time() - synced_at > HIGHLIGHTS_MAX_AGE:
+        result = sync_highlights(api_key, book_id=book_id)
+        if result["status"] != "success":
+            if synced_at is None:
+                return {"status": "error", "message": f"Failed to fetch highlights: {result['message']}", "response": result.get("response")}
+            logging.warning(f"⚠️ Highlight sync failed, serving the local copy: {result['message']}")
+
+    return {"status": "success", "highlights": store.get_highlights(book["id"])}
+
+def search_highlights(query, book_title=None, limit=20):
+    """Full-text search over locally mirrored highlights."""
+    store = readwise_store.get_store()
+    book_id = None
+    if book_title:
+        book = store.find_book(book_title)
+        if not book:
+            return {"status": "error", "message": f"Book '{book_title}' not found in cache."}
+        book_id = book["id"]
+    highlights = store.search_highlights(query, book_id, limit)
+    return {"status": "success", "highlights": highlights} if highlights else {"status": "error", "message": "No matches found."}
 
 def main():
     parser = argparse.ArgumentParser(description="Readwise Tool CLI")
-    parser.add_argument("action", choices=["fetch_books", "fetch_highlights", "get_supported_actions"], help="Action to perform")
+    parser.add_argument("action", choices=["fetch_books", "fetch_highlights", "search_highlights", "sync", "get_supported_actions"], help="Action to perform")
     parser.add_argument("--params", type=str, required=False, help="JSON-encoded parameters for the action")
 
     args = parser.parse_args()
@@ -73,12 +199,16 @@ def main():
     params = json.loads(args.params) if args.params else {}
 
     if args.action == "fetch_books":
-        result = fetch_books(api_key, params.get("page_size", 50))
+        result = fetch_books(api_key, params.get("page_size", 50), params.get("full", False))
     elif args.action == "fetch_highlights":
         if "book_title" not in params:
             result = {"status": "error", "message": "❌ 'book_title' is required for fetch_highlights."}
         else:
-            result = fetch_highlights(api_key, params["book_title"])
+            result = fetch_highlights(api_key, params["book_title"], params.get("refresh", False))
+    elif args.action == "search_highlights":
+        result = search_highlights(params.get("query", ""), params.get("book_title"), params.get("limit", 20))
+    elif args.action == "sync":
+        result = sync(api_key, params.get("full", False))
     elif args.action == "get_supported_actions":
         result = get_supported_actions()
     else:
@@ -0,0 +1,106 @@
+import os
+import re
+import sqlite3
+import threading
+
+RECALL_INDEX_DB = "orchestrate_recall_index.db"
+DEFAULT_LIMIT = 20
+
+# "quoted phrases" or bare terms
+QUERY_TOKEN = re.compile(r'"([^"]+)"|(\S+)')
+
+
+def build_match_query(query, match="all"):
+    """Turns free text into an FTS5 MATCH expression.
+
+    Bare words are stemmed terms, "quoted text" is an exact phrase. match="all" requires
+    every term; match="any" ranks entries containing any of them.
+    """
+    parts = []
+    for phrase, term in QUERY_TOKEN.findall(query):
+        text = (phrase or term).strip()
+        if text:
+            parts.append('"' + text.replace('"', '""') + '"')
+    return f" {'OR' if match == 'any' else 'AND'} ".join(parts)
+
+
+class RecallIndex:
+    """Persistent inverted index over recall entries (SQLite FTS5, Porter stemming, BM25 ranking)."""
+
+    def __init__(self, db_path=RECALL_INDEX_DB):
+        self.db_path = db_path
+        self._local = threading.local()
+        conn = self._db()
+        with conn:
+            conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS entries USING fts5("
+                "content, context UNINDEXED, timestamp UNINDEXED, tokenize = 'porter unicode61')"
+            )
+
+    def _db(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def count(self):
+        return self._db().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def add(self, entry):
+        """Indexes one entry. Called by add_entry so the index stays current incrementally."""
+        conn = self._db()
+        with conn:
+            conn.execute(
+                "INSERT INTO entries (content, context, timestamp) VALUES (?, ?, ?)",
+                (entry.get("content", ""), entry.get("context", "General"), entry.get("timestamp"))
+            )
+
+    def rebuild(self, entries):
+        """Replaces the index with the given entries."""
+        conn = self._db()
+        with conn:
+            conn.execute("DELETE FROM entries")
+            conn.executemany(
+                "INSERT INTO entries (content, context, timestamp) VALUES (?, ?, ?)",
+                [(e.get("content", ""), e.get("context", "General"), e.get("timestamp")) for e in entries]
+            )
+            conn.execute("INSERT INTO entries (entries) VALUES ('optimize')")
+        return len(entries)
+
+    def search(self, query, context=None, limit=DEFAULT_LIMIT, match="all"):
+        """Returns the top `limit` entries for query, best BM25 score first."""
+        match_query = build_match_query(query, match)
+        if not match_query:
+            return []
+
+        sql = "SELECT content, context, timestamp, bm25(entries) AS score FROM entries WHERE entries MATCH ?"
+        args = [match_query]
+        if context:
+            sql += " AND context = ?"
+            args.append(context)
+        sql += " ORDER BY score LIMIT ?"
+        args.append(limit)
+
+        rows = self._db().execute(sql, args).fetchall()
+        # FTS5's bm25() is lower-is-better; flip it so larger means more relevant
+        return [
+            {"timestamp": timestamp, "content": content, "context": ctx, "score": round(-score, 4)}
+            for content, ctx, timestamp, score in rows
+        ]
+
+
+_index = None
+
+
+def get_index(entries_loader=None):
+    """Returns the process-wide index. A new index is backfilled from entries_loader()."""
+    global _index
+    if _index is None:
+        db_path = os.getenv("ORCHESTRATE_RECALL_INDEX_DB", RECALL_INDEX_DB)
+        is_new = not os.path.exists(db_path)
+        _index = RecallIndex(db_path)
+        if is_new and entries_loader:
+            _index.rebuild(entries_loader())
+    return _index
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_DB = "orchestrate_cache.db"
+MAX_MEMORY_ENTRIES = 512    # LRU cap for the in-memory tier
+MAX_DISK_ENTRIES = 10000    # Oldest-accessed rows past this are pruned from the disk tier
+PRUNE_EVERY = 100           # Writes between disk-tier pruning passes
+
+# 🔥 Actions that change state are never cached, whatever the tool's TTL
+SIDE_EFFECT_PREFIXES = (
+    "add_", "apply_", "batch_", "commit_", "create_", "delete_", "execute_", "generate_",
+    "install", "modify_", "move_", "remove_", "send_", "uninstall", "update_", "upload_", "write_"
+)
+
+
+def make_key(tool, action, params):
+    """Content-addressed key: sha256 of the canonical JSON of tool, action and params."""
+    canonical = json.dumps({"tool": tool, "action": action, "params": params}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def cache_ttl(tool, action, tool_config=None):
+    """Returns the TTL in seconds for a tool action, or 0 if it must not be cached.
+
+    Tools opt in with "cache_ttl" in orchestrate_tools.json and can list extra
+    "no_cache_actions" on top of the side-effect prefixes. No tool in orchestrate_tools.json
+    opts in yet: the read-only candidates either serve a local mirror that is already cheap
+    (readwise_tool) or read data that other actions and people change (airtable_tool).
+    """
+    tool_config = tool_config or {}
+    ttl = tool_config.get("cache_ttl", 0)
+    if not ttl or action.startswith(SIDE_EFFECT_PREFIXES) or action in tool_config.get("no_cache_actions", []):
+        return 0
+    return ttl
+
+
+def is_cacheable_result(result):
+    if not isinstance(result, (dict, list)):
+        return False
+    return not (isinstance(result, dict) and ("error" in result or result.get("status") == "error"))
+
+
+class ResultCache:
+    """Two-tier cache: an in-memory LRU in front of a SQLite table shared across processes.
+
+    Both tiers hold the JSON text, so every hit decodes a fresh copy that callers may modify.
+    """
+
+    def __init__(self, db_path=CACHE_DB, max_entries=MAX_MEMORY_ENTRIES, max_disk_entries=MAX_DISK_ENTRIES):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self._memory = OrderedDict()  # key -> (expires_at, JSON text)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+
+    def _db(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, tool TEXT, expires_at REAL, last_access REAL, value TEXT)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_results_last_access ON results(last_access)")
+            self._local.conn = conn
+        return conn
+
+    def _remember(self, key, expires_at, value):
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def get(self, key):
+        """Returns (hit, value)."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    return True, json.loads(entry[1])
+                del self._memory[key]
+
+        try:
+            conn = self._db()
+            row = conn.execute("SELECT expires_at, value FROM results WHERE key = ?", (key,)).fetchone()
+            if not row:
+                return False, None
+            if row[0] <= now:
+                with conn:
+                    conn.execute("DELETE FROM results WHERE key = ?", (key,))
+                return False, None
+            with conn:
+                conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (now, key))
+        except sqlite3.Error as e:
+            logging.warning(f"⚠️ Result cache read failed: {e}")
+            return False, None
+
+        self._remember(key, row[0], row[1])
+        return True, json.loads(row[1])
+
+    def set(self, key, tool, value, ttl):
+        now = time.time()
+        expires_at = now + ttl
+        text = json.dumps(value)
+        self._remember(key, expires_at, text)
+        try:
+            conn = self._db()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO results (key, tool, expires_at, last_access, value) VALUES (?, ?, ?, ?, ?)",
+                    (key, tool, expires_at, now, text)
+                )
+                self._writes += 1
+                if self._writes % PRUNE_EVERY == 1:
+                    conn.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+                    conn.execute(
+                        "DELETE FROM results WHERE key IN ("
+                        "SELECT key FROM results ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                        (self.max_disk_entries,)
+                    )
+        except sqlite3.Error as e:
+            logging.warning(f"⚠️ Result cache write failed: {e}")
+
+    def clear(self, tool=None):
+        """Drops every cached result, or only those for one tool (the memory tier is always emptied)."""
+        with self._lock:
+            self._memory.clear()
+        conn = self._db()
+        with conn:
+            if tool:
+                conn.execute("DELETE FROM results WHERE tool = ?", (tool,))
+            else:
+                conn.execute("DELETE FROM results")
+
+
+_cache = None
+
+
+def get_cache():
+    """Returns the process-wide result cache."""
+    global _cache
+    if _cache is None:
+        _cache = ResultCache(os.getenv("ORCHESTRATE_CACHE_DB", CACHE_DB))
+    return _cache
+
+
+def cached_call(tool, action, params, run, tool_config=None):
+    """Returns a cached result for (tool, action, params) or calls run() and caches its result."""
+    ttl = cache_ttl(tool, action, tool_config)
+    if not ttl:
+        return run()
+
+    cache = get_cache()
+    key = make_key(tool, action, params)
+    hit, value = cache.get(key)
+    if hit:
+        return value
+
+    result = run()
+    if is_cacheable_result(result):
+        cache.set(key, tool, result, ttl)
+    return result
@@ -1,50 +1,45 @@
 import argparse
 import json
-import os
+
+import json_store
 
 CREDENTIALS_FILE = "credentials.json"
 ROADMAP_FILE = "roadmap.json"
 
+def roadmap_store():
+    """Journaled store behind the roadmap file."""
+    return json_store.get_store(ROADMAP_FILE, {"In Development": []})
+
 def load_roadmap():
     """Load the current roadmap from JSON."""
-    if not os.path.exists(ROADMAP_FILE):
-        return {"In Development": []}
-    with open(ROADMAP_FILE, "r") as f:
-        return json.load(f)
-
-def save_roadmap(roadmap):
-    """Save the updated roadmap to JSON."""
-    with open(ROADMAP_FILE, "w") as f:
-        json.dump(roadmap, f, indent=4)
+    return roadmap_store().read()
 
 def execute_action(action, params):
     """Executes a roadmap management action."""
-    roadmap = load_roadmap()
+    store = roadmap_store()
     
     if action == "add_feature":
         feature, description, eta = params.get("input"), params.get("options", {}).get("description"), params.get("options", {}).get("eta")
         if not feature or not description or not eta:
             return {"status": "error", "message": "Missing required fields."}
-        if "In Development" not in roadmap:
-            roadmap["In Development"] = []
-        if any(f["feature"] == feature for f in roadmap["In Development"]):
-            return {"status": "error", "message": f"Feature '{feature}' already exists."}
-        roadmap["In Development"].append({"feature": feature, "description": description, "eta": eta})
-        save_roadmap(roadmap)
+        with store.transaction() as roadmap:
+            if any(f["feature"] == feature for f in roadmap.get("In Development", [])):
+                return {"status": "error", "message": f"Feature '{feature}' already exists."}
+            store.append(["In Development"], {"feature": feature, "description": description, "eta": eta})
         return {"status": "success", "message": f"Feature '{feature}' added successfully."}
     elif action == "update_feature":
         feature, new_description, new_eta = params.get("input"), params.get("options", {}).get("new_description"), params.get("options", {}).get("new_eta")
-        for f in roadmap.get("In Development", []):
-            if f["feature"] == feature:
-                if new_description:
-                    f["description"] = new_description
-                if new_eta:
-                    f["eta"] = new_eta
-                save_roadmap(roadmap)
-                return {"status": "success", "message": f"Feature '{feature}' updated successfully."}
+        with store.transaction() as roadmap:
+            for index, f in enumerate(roadmap.get("In Development", [])):
+                if f["feature"] == feature:
+                    if new_description:
+                        store.set(["In Development", index, "description"], new_description)
+                    if new_eta:
+                        store.set(["In Development", index, "eta"], new_eta)
+                    return {"status": "success", "message": f"Feature '{feature}' updated successfully."}
         return {"status": "error", "message": f"Feature '{feature}' not found."}
     elif action == "list_features":
-        return {"status": "success", "roadmap": roadmap}
+        return {"status": "success", "roadmap": load_roadmap()}
     else:
         return {"status": "error", "message": "Invalid action or missing parameters."}
 
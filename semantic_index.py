@@ -0,0 +1,265 @@
+import fcntl
+import json
+import math
+import os
+import re
+import threading
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+
+import numpy as np
+
+INDEX_ROOT = ".semantic_index"
+DIM = 1024                # Hashed feature buckets per embedding
+BATCH_ROWS = 32768        # Rows per dot-product block during exact search
+REFRESH_GROWTH = 2.0      # Re-embed everything with fresh IDF weights once the corpus doubles
+ANN_THRESHOLD = 20000     # Rows before queries switch from exact scan to the clustered (IVF) index
+ANN_PROBE = 8             # Clusters scanned per approximate query
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE = 20000
+
+TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Lowercased words plus adjacent word pairs, so a little word order survives hashing."""
+    words = TOKEN.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def _features(text, dim):
+    """Signed hashed term frequencies: [(bucket, weight), ...]."""
+    features = []
+    for token, tf in Counter(tokenize(text)).items():
+        h = zlib.crc32(token.encode("utf-8"))
+        sign = 1.0 if h & 0x80000000 else -1.0
+        features.append((h % dim, sign * (1.0 + math.log(tf))))
+    return features
+
+
+def _text_key(text):
+    return zlib.crc32(text.encode("utf-8"))
+
+
+class SemanticIndex:
+    """Hashed TF-IDF embeddings in a memory-mapped float32 matrix, queried by cosine similarity.
+
+    Rows follow the order of the documents passed to search(), which is assumed to be append-only:
+    new documents are embedded incrementally and any edit to earlier ones triggers a rebuild.
+    Past ANN_THRESHOLD rows, queries only scan the ANN_PROBE k-means clusters nearest the query.
+    """
+
+    def __init__(self, name, root=INDEX_ROOT, dim=DIM):
+        self.dir = os.path.join(root, name)
+        os.makedirs(self.dir, exist_ok=True)
+        self.dim = dim
+        self.meta_path = os.path.join(self.dir, "meta.json")
+        self.lock_path = os.path.join(self.dir, "lock")
+        self._thread_lock = threading.Lock()
+        self._meta_signature = None
+        self._meta = None
+        self._keys = None
+        self._df = None
+        self._idf = None
+        self._vectors = None
+        self._assign = None
+        self._centroids = None
+
+    # --- Storage -----------------------------------------------------------------
+
+    @contextmanager
+    def _locked(self, exclusive):
+        with self._thread_lock, open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+
+    def _path(self, name):
+        return os.path.join(self.dir, name)
+
+    def _load(self):
+        """(Re)opens the index files when another process (or this one) has changed them."""
+        try:
+            st = os.stat(self.meta_path)
+            signature = (st.st_ino, st.st_mtime_ns)
+        except FileNotFoundError:
+            signature = None
+        if signature == self._meta_signature and self._meta is not None:
+            return
+
+        if signature is None:
+            self._meta = {"dim": self.dim, "count": 0, "capacity": 0, "docs_at_build": 0}
+            self._keys = np.zeros(0, dtype=np.uint32)
+            self._df = np.zeros(self.dim, dtype=np.int64)
+            self._centroids = None
+        else:
+            with open(self.meta_path, "r") as f:
+                self._meta = json.load(f)
+            self._keys = np.load(self._path("keys.npy"))
+            self._df = np.load(self._path("df.npy"))
+            self._centroids = np.load(self._path("centroids.npy")) if self._meta.get("ann") else None
+        self._meta_signature = signature
+        self._open_matrices()
+        self._idf = (np.log((1 + self._meta["count"]) / (1 + self._df)) + 1).astype(np.float32)
+
+    def _open_matrices(self):
+        capacity = self._meta["capacity"]
+        if not capacity:
+            self._vectors = self._assign = None
+            return
+        self._vectors = np.memmap(self._path("vectors.f32"), dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._assign = np.memmap(self._path("assign.i32"), dtype=np.int32, mode="r+", shape=(capacity,))
+
+    def _ensure_capacity(self, rows):
+        capacity = self._meta["capacity"]
+        if rows <= capacity:
+            return
+        capacity = max(rows, capacity * 2, 1024)
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._assign.flush()
+        for name, width in (("vectors.f32", self.dim * 4), ("assign.i32", 4)):
+            with open(self._path(name), "ab") as f:
+                f.truncate(capacity * width)
+        self._meta["capacity"] = capacity
+        self._open_matrices()
+
+    def _save_array(self, name, array):
+        tmp_path = self._path(f"{name}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp_path, self._path(name))
+
+    def _commit(self):
+        """Flushes the matrices, then publishes the new state by replacing meta.json last."""
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._assign.flush()
+        self._save_array("keys.npy", self._keys)
+        self._save_array("df.npy", self._df)
+        if self._meta.get("ann"):
+            self._save_array("centroids.npy", self._centroids)
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._meta, f)
+        os.replace(tmp_path, self.meta_path)
+        self._meta_signature = None
+        self._load()
+
+    # --- Embedding ---------------------------------------------------------------
+
+    def _embed(self, texts, idf):
+        """Returns an (n, dim) float32 matrix of L2-normalized embeddings."""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for bucket, weight in _features(text, self.dim):
+                matrix[row, bucket] += weight
+        matrix *= idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+
+    def _count_df(self, texts):
+        for text in texts:
+            for bucket in {bucket for bucket, _ in _features(text, self.dim)}:
+                self._df[bucket] += 1
+
+    def _sync(self, texts):
+        """Brings the index in line with texts. Caller holds the exclusive lock."""
+        keys = np.fromiter((_text_key(text) for text in texts), dtype=np.uint32, count=len(texts))
+        count = self._meta["count"]
+        if np.array_equal(keys, self._keys):
+            return
+
+        grown = len(texts) >= REFRESH_GROWTH * self._meta["docs_at_build"]
+        if not count or grown or len(texts) < count or not np.array_equal(keys[:count], self._keys):
+            # First build, earlier documents changed, or IDF weights are stale: re-embed everything
+            self._df = np.zeros(self.dim, dtype=np.int64)
+            self._meta.update(count=0, docs_at_build=len(texts), ann=None)
+            self._centroids = None
+            start = 0
+        else:
+            start = count
+
+        new_texts = texts[start:]
+        self._count_df(new_texts)
+        idf = (np.log((1 + len(texts)) / (1 + self._df)) + 1).astype(np.float32)
+        self._ensure_capacity(len(texts))
+        for offset in range(0, len(new_texts), BATCH_ROWS):
+            block = self._embed(new_texts[offset:offset + BATCH_ROWS], idf)
+            rows = slice(start + offset, start + offset + len(block))
+            self._vectors[rows] = block
+            if self._centroids is not None:
+                self._assign[rows] = np.argmax(block @ self._centroids.T, axis=1)
+
+        self._keys = keys
+        self._meta["count"] = len(texts)
+        if self._centroids is None and len(texts) >= ANN_THRESHOLD:
+            self._train_clusters(len(texts))
+        self._commit()
+
+    def _train_clusters(self, count):
+        """Spherical k-means over a sample of rows, then assigns every row to its nearest centroid."""
+        nlist = max(1, int(math.sqrt(count)))
+        rng = np.random.default_rng(0)
+        sample = self._vectors[np.sort(rng.choice(count, size=min(count, KMEANS_SAMPLE), replace=False))]
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+
+        for _ in range(KMEANS_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            filled = norms[:, 0] > 0
+            centroids[filled] = sums[filled] / norms[filled]
+
+        for start in range(0, count, BATCH_ROWS):
+            block = self._vectors[start:min(count, start + BATCH_ROWS)]
+            self._assign[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+        self._centroids = centroids
+        self._meta["ann"] = {"nlist": nlist, "trained_at": count}
+
+    # --- Public API --------------------------------------------------------------
+
+    def search(self, texts, query, top_k=10):
+        """Returns [(position in texts, score), ...] for the top_k texts most similar to query."""
+        with self._locked(exclusive=True):
+            self._load()
+            self._sync(texts)
+
+            count = self._meta["count"]
+            if not count or not query.strip():
+                return []
+            q = self._embed([query], self._idf)[0]
+            if not q.any():
+                return []
+
+            if self._centroids is not None:
+                probe = np.argsort(self._centroids @ q)[::-1][:ANN_PROBE]
+                rows = np.flatnonzero(np.isin(self._assign[:count], probe))
+                scores = self._vectors[rows] @ q
+            else:
+                rows = np.arange(count)
+                scores = np.concatenate([
+                    self._vectors[start:min(count, start + BATCH_ROWS)] @ q
+                    for start in range(0, count, BATCH_ROWS)
+                ])
+
+        k = min(top_k, len(scores))
+        if not k:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(rows[i]), round(float(scores[i]), 4)) for i in top if scores[i] > 0]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(name):
+    """Returns the process-wide index for a corpus, so its matrices stay mapped between queries."""
+    with _indexes_lock:
+        if name not in _indexes:
+            _indexes[name] = SemanticIndex(name, os.getenv("ORCHESTRATE_SEMANTIC_INDEX_DIR", INDEX_ROOT))
+        return _indexes[name]
@@ -1,7 +1,7 @@
 import requests
 import json
 
-SERVER_URL = "http://localhost:5005/execute_task"
+SERVER_URL = "http://localhost:5005/execute_batch"
 
 tools_to_test = [
     {"tool_name": "gmail_tool", "action": "fetch_unread", "params": {"input": "label:inbox"}},
@@ -11,25 +11,22 @@ tools_to_test = [
     {"tool_name": "mailjet_tool", "action": "send_email", "params": {"input": "srini@unmistakablemedia.com", "options": {"subject": "Test Email", "body": "This is a test email from Mailjet."}}}
 ]
 
-def execute_server_test(tool_name, action, params):
-    """Sends a request to the Orchestrate API server to execute a tool action."""
-    payload = {
-        "tool_name": tool_name,
-        "action": action,
-        "params": params
-    }
-    
-    response = requests.post(SERVER_URL, json=payload)
+def execute_server_batch(items):
+    """Sends every tool action to the Orchestrate API server in a single batch request."""
+    response = requests.post(SERVER_URL, json={"items": items})
     try:
         return response.json()
     except json.JSONDecodeError:
         return {"status": "error", "message": "Invalid JSON response from server."}
 
 def main():
+    batch = execute_server_batch(tools_to_test)
+    results = batch.get("results", {})
+
     test_results = []
-    for tool in tools_to_test:
-        result = execute_server_test(tool["tool_name"], tool["action"], tool["params"])
-        test_results.append({"tool": tool["tool_name"], "status": result.get("status", "error"), "output": result})
+    for index, tool in enumerate(tools_to_test):
+        outcome = results.get(str(index), {"status": "error", "error": batch})
+        test_results.append({"tool": tool["tool_name"], "status": outcome["status"], "output": outcome.get("result", outcome.get("error"))})
     
     print(json.dumps(test_results, indent=4))
 
@@ -1,23 +1,19 @@
 import json
-import os
 import argparse
 
+import json_store
+import semantic_index
+
 SPARK_FILE_PATH = "spark_file.json"
 
+def spark_store():
+    """Journaled store behind the Spark File."""
+    return json_store.get_store(SPARK_FILE_PATH, {"entries": []})
+
 def load_spark_file():
     """Loads Spark File data, ensuring 'entries' key exists."""
-    if os.path.exists(SPARK_FILE_PATH):
-        with open(SPARK_FILE_PATH, "r") as f:
-            data = json.load(f)
-            if "entries" not in data:
-                data["entries"] = []  # Ensure 'entries' exists
-            return data
-    return {"entries": []}
-
-def save_spark_file(data):
-    """Saves updates to Spark File."""
-    with open(SPARK_FILE_PATH, "w") as f:
-        json.dump(data, f, indent=4)
+    data = spark_store().read()
+    return data if "entries" in data else {**data, "entries": []}
 
 def execute_action(action, params):
     """Executes Spark File actions."""
@@ -25,19 +21,24 @@ def execute_action(action, params):
     
     if action == "add_entry":
         entry = {"content": params.get("input", ""), "category": params.get("options", {}).get("category", "General")}
-        data["entries"].append(entry)
-        save_spark_file(data)
+        spark_store().append(["entries"], entry)
         return {"status": "success", "message": "Entry added successfully."}
     elif action == "search_entries":
         query = params.get("input", "").lower()
         results = [entry for entry in data["entries"] if query in entry["content"].lower()]
         return {"status": "success", "results": results} if results else {"status": "error", "message": "No matches found."}
+    elif action == "semantic_search":
+        texts = [entry.get("content", "") for entry in data["entries"]]
+        top_k = params.get("options", {}).get("top_k", 10)
+        hits = semantic_index.get_index("spark_file").search(texts, params.get("input", ""), top_k)
+        results = [{**data["entries"][position], "score": score} for position, score in hits]
+        return {"status": "success", "results": results} if results else {"status": "error", "message": "No matches found."}
     else:
         return {"status": "error", "message": "Invalid action or missing parameters."}
 
 def main():
     parser = argparse.ArgumentParser(description="Spark File Tool")
-    parser.add_argument("action", choices=["add_entry", "search_entries"], help="Action to perform")
+    parser.add_argument("action", choices=["add_entry", "search_entries", "semantic_search"], help="Action to perform")
     parser.add_argument("--params", type=str, required=True, help="JSON-encoded parameters")
     args = parser.parse_args()
     
@@ -0,0 +1,321 @@
+import argparse
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+import tool_registry
+import tool_runtime
+
+QUEUE_DB = "orchestrate_queue.db"
+LEGACY_QUEUE_FILE = "orchestrate_queue.json"  # Old autonomy.py queue, drained into the database
+
+VISIBILITY_TIMEOUT = 600  # Seconds a claimed task stays invisible before another worker may retry it
+HEARTBEATS_PER_LEASE = 3  # A running task's lease is renewed this many times per visibility timeout
+MAX_ATTEMPTS = 3
+BACKOFF_BASE = 5          # Seconds; retry n waits BACKOFF_BASE * 2**(n-1) plus jitter
+BACKOFF_MAX = 600
+POLL_INTERVAL = 0.5       # Seconds an idle worker waits before checking the queue again
+
+
+class TaskQueue:
+    """Durable SQLite (WAL) queue with atomic claim/ack, visibility timeouts and retries."""
+
+    def __init__(self, db_path=QUEUE_DB):
+        self.db_path = db_path
+        self._local = threading.local()
+        with self._db() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "tool_name TEXT NOT NULL, action TEXT NOT NULL, params TEXT NOT NULL, "
+                "status TEXT NOT NULL DEFAULT 'queued', "
+                "attempts INTEGER NOT NULL DEFAULT 0, max_attempts INTEGER NOT NULL, "
+                "available_at REAL NOT NULL, lease_expires_at REAL, claimed_by TEXT, "
+                "result TEXT, error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_ready ON tasks(status, available_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_lease ON tasks(status, lease_expires_at)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _db(self):
+        return _Transaction(self._conn())
+
+    def enqueue(self, tool_name, action, params=None, max_attempts=MAX_ATTEMPTS, delay=0):
+        """Adds a task and returns its id."""
+        with self._db() as conn:
+            return self._insert(conn, tool_name, action, params, max_attempts, delay)
+
+    def _insert(self, conn, tool_name, action, params=None, max_attempts=MAX_ATTEMPTS, delay=0):
+        now = time.time()
+        cursor = conn.execute(
+            "INSERT INTO tasks (tool_name, action, params, max_attempts, available_at, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (tool_name, action, json.dumps(params or {}), max_attempts, now + delay, now, now)
+        )
+        return cursor.lastrowid
+
+    def claim(self, worker_id, visibility_timeout=VISIBILITY_TIMEOUT):
+        """Atomically takes the next ready task, or one whose lease expired. Returns a dict or None."""
+        now = time.time()
+        with self._db() as conn:
+            rows = conn.execute(
+                "UPDATE tasks SET status = 'running', attempts = attempts + 1, claimed_by = ?, "
+                "lease_expires_at = ?, updated_at = ? "
+                "WHERE id = ("
+                "  SELECT id FROM tasks"
+                "  WHERE (status = 'queued' AND available_at <= ?)"
+                "     OR (status = 'running' AND lease_expires_at <= ?)"
+                "  ORDER BY available_at, id LIMIT 1"
+                ") RETURNING *",
+                (worker_id, now + visibility_timeout, now, now, now)
+            ).fetchall()
+        return _row_to_task(rows[0]) if rows else None
+
+    def ack(self, task_id, worker_id, result):
+        """Marks a claimed task as succeeded. Returns False if the lease was lost to another worker."""
+        with self._db() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET status = 'succeeded', result = ?, error = NULL, lease_expires_at = NULL, updated_at = ? "
+                "WHERE id = ? AND status = 'running' AND claimed_by = ?",
+                (json.dumps(result), time.time(), task_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def extend_lease(self, task_id, worker_id, visibility_timeout=VISIBILITY_TIMEOUT):
+        """Pushes a running task's lease out again. Returns False if the lease was lost to another worker."""
+        now = time.time()
+        with self._db() as conn:
+            cursor = conn.execute(
+                "UPDATE tasks SET lease_expires_at = ?, updated_at = ? WHERE id = ? AND status = 'running' AND claimed_by = ?",
+                (now + visibility_timeout, now, task_id, worker_id)
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, task_id, worker_id, error):
+        """Schedules a retry with exponential backoff, or marks the task failed after max_attempts."""
+        now = time.time()
+        with self._db() as conn:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM tasks WHERE id = ? AND status = 'running' AND claimed_by = ?",
+                (task_id, worker_id)
+            ).fetchone()
+            if not row:
+                return False
+
+            if row["attempts"] >= row["max_attempts"]:
+                conn.execute(
+                    "UPDATE tasks SET status = 'failed', error = ?, lease_expires_at = NULL, updated_at = ? WHERE id = ?",
+                    (error, now, task_id)
+                )
+            else:
+                backoff = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (row["attempts"] - 1))
+                conn.execute(
+                    "UPDATE tasks SET status = 'queued', error = ?, available_at = ?, lease_expires_at = NULL, "
+                    "claimed_by = NULL, updated_at = ? WHERE id = ?",
+                    (error, now + backoff + random.uniform(0, backoff / 2), now, task_id)
+                )
+            return True
+
+    def get(self, task_id):
+        row = self._conn().execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return _row_to_task(row) if row else None
+
+    def counts(self):
+        """Returns the number of tasks in each status."""
+        rows = self._conn().execute("SELECT status, COUNT(*) AS n FROM tasks GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    def import_legacy_queue(self, queue_file=LEGACY_QUEUE_FILE):
+        """Moves tasks from the old orchestrate_queue.json into the database without losing new writes.
+
+        The file is renamed before it is read, so anything appended mid-import lands in a fresh file.
+        All its tasks go in one transaction; if the file can't be imported it is left at its
+        .importing name for a look by hand, and the daemon carries on.
+        """
+        if not os.path.exists(queue_file):
+            return 0
+        claimed_file = f"{queue_file}.{uuid.uuid4().hex}.importing"
+        try:
+            os.rename(queue_file, claimed_file)
+        except FileNotFoundError:
+            return 0
+
+        try:
+            with open(claimed_file, "r") as f:
+                legacy_tasks = json.load(f)
+            if not isinstance(legacy_tasks, list) or not all(isinstance(task, dict) for task in legacy_tasks):
+                raise ValueError("expected a list of task objects")
+            with self._db() as conn:
+                for task in legacy_tasks:
+                    # Old tasks named the script by action and carried no tool_name
+                    self._insert(conn, task.get("tool_name", task.get("action")), task.get("action"), task.get("params", {}))
+        except (OSError, ValueError, TypeError, sqlite3.Error) as e:
+            logging.error(f"❌ Could not import {queue_file}: {e}. Left at {claimed_file}.")
+            return 0
+
+        os.remove(claimed_file)
+        logging.info(f"📌 Imported {len(legacy_tasks)} tasks from {queue_file}.")
+        return len(legacy_tasks)
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT around a block, so claims never race between processes."""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+def _row_to_task(row):
+    task = dict(row)
+    task["params"] = json.loads(task["params"])
+    task["result"] = json.loads(task["result"]) if task["result"] is not None else None
+    return task
+
+
+def execute_queued_task(task):
+    """Runs a queued tool action the same way the server does. Returns (ok, result_or_error)."""
+    tool = tool_registry.get_registry().get_tool(task["tool_name"])
+    if tool is None:
+        return False, f"Tool '{task['tool_name']}' not found."
+
+    script_path = tool.get("path")
+    if not script_path or not os.path.isfile(script_path):
+        return False, f"Script for '{task['tool_name']}' not found."
+
+    result = None
+    if tool.get("execution", "in_process") != "subprocess":
+        result = tool_runtime.run_in_process(task["tool_name"], script_path, task["action"], task["params"])
+    if result is None:
+        result = tool_runtime.run_subprocess(script_path, task["action"], task["params"], timeout=tool.get("timeout"))
+
+    if isinstance(result, dict) and ("error" in result or result.get("status") == "error"):
+        return False, json.dumps(result)
+    return True, result
+
+
+class QueueWorkers:
+    """A pool of threads that claim, run and ack tasks until stopped."""
+
+    def __init__(self, queue, num_workers=4, visibility_timeout=VISIBILITY_TIMEOUT, poll_interval=POLL_INTERVAL):
+        self.queue = queue
+        self.num_workers = num_workers
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for n in range(self.num_workers):
+            worker_id = f"{os.getpid()}-{n}-{uuid.uuid4().hex[:6]}"
+            thread = threading.Thread(target=self._run, args=(worker_id,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logging.info(f"🔥 Started {self.num_workers} queue workers.")
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _run(self, worker_id):
+        while not self._stop.is_set():
+            try:
+                task = self.queue.claim(worker_id, self.visibility_timeout)
+            except sqlite3.Error as e:
+                logging.error(f"❌ Queue claim failed: {e}")
+                task = None
+
+            if task is None:
+                self._stop.wait(self.poll_interval)
+                continue
+
+            logging.info(f"🚀 Executing task {task['id']}: {task['tool_name']} -> {task['action']} (attempt {task['attempts']})")
+            # Keep the lease alive while the task runs, so a slow task isn't handed to a second worker
+            done = threading.Event()
+            heartbeat = threading.Thread(target=self._heartbeat, args=(task["id"], worker_id, done), daemon=True)
+            heartbeat.start()
+            try:
+                ok, outcome = execute_queued_task(task)
+            except Exception as e:
+                ok, outcome = False, str(e)
+            finally:
+                done.set()
+                heartbeat.join()
+
+            if ok:
+                recorded = self.queue.ack(task["id"], worker_id, outcome)
+            else:
+                recorded = self.queue.fail(task["id"], worker_id, outcome)
+
+            if not recorded:
+                logging.warning(f"⚠️ Task {task['id']} finished after its lease was lost; another worker owns it now. Result discarded.")
+            elif ok:
+                logging.info(f"✅ Task {task['id']} done.")
+            else:
+                logging.error(f"❌ Task {task['id']} failed: {outcome}")
+
+    def _heartbeat(self, task_id, worker_id, done):
+        interval = self.visibility_timeout / HEARTBEATS_PER_LEASE
+        while not done.wait(interval):
+            try:
+                if not self.queue.extend_lease(task_id, worker_id, self.visibility_timeout):
+                    logging.warning(f"⚠️ Lost the lease on task {task_id}.")
+                    return
+            except sqlite3.Error as e:
+                logging.error(f"❌ Lease renewal for task {task_id} failed: {e}")
+
+
+_queue = None
+
+
+def get_queue():
+    """Returns the process-wide queue."""
+    global _queue
+    if _queue is None:
+        _queue = TaskQueue(os.getenv("ORCHESTRATE_QUEUE_DB", QUEUE_DB))
+    return _queue
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Orchestrate task queue daemon")
+    parser.add_argument("--workers", type=int, default=4, help="Number of worker threads")
+    parser.add_argument("--visibility-timeout", type=float, default=VISIBILITY_TIMEOUT, help="Seconds before an unacked task is retried")
+    args = parser.parse_args()
+
+    logging.basicConfig(filename="autonomy.log", level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    logging.info("🔥 Queue daemon started. Watching for tasks...")
+
+    queue = get_queue()
+    workers = QueueWorkers(queue, args.workers, args.visibility_timeout)
+    workers.start()
+    try:
+        while True:
+            queue.import_legacy_queue()
+            time.sleep(5)
+    except KeyboardInterrupt:
+        workers.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+TASKS_DB = "orchestrate_tasks.db"
+TASKS_FILE = "orchestrate_tasks.json"  # Imported once when the database is first created
+
+# Fields stored in their own indexed/sortable columns; anything else goes in "extra"
+TASK_COLUMNS = [
+    "task_id", "content", "description", "project", "status",
+    "priority", "impact", "execution_time_estimate", "last_touched"
+]
+SORTABLE_FIELDS = set(TASK_COLUMNS) | {"position"}
+
+
+class TaskStore:
+    """SQLite-backed task storage with indexes on task_id, status, project and priority."""
+
+    def __init__(self, db_path=TASKS_DB, import_file=TASKS_FILE):
+        self.db_path = db_path
+        self._local = threading.local()
+        is_new = not os.path.exists(db_path)
+        with self._db() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tasks ("
+                "task_id TEXT PRIMARY KEY, content TEXT, description TEXT, project TEXT, status TEXT, "
+                "priority, impact TEXT, execution_time_estimate, last_touched TEXT, "
+                "position INTEGER NOT NULL, extra TEXT NOT NULL DEFAULT '{}')"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_project ON tasks(project)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks(priority)")
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_tasks_position ON tasks(position)")
+        if is_new and import_file and os.path.exists(import_file):
+            self.import_json(import_file)
+
+    def _db(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _next_task_id(self, conn):
+        candidate = int(time.time())
+        while conn.execute("SELECT 1 FROM tasks WHERE task_id = ?", (str(candidate),)).fetchone():
+            candidate += 1
+        return str(candidate)
+
+    def _insert(self, conn, task, position):
+        task = dict(task)
+        task.setdefault("task_id", self._next_task_id(conn))
+        task.setdefault("status", "pending")
+        task.setdefault("last_touched", datetime.utcnow().isoformat())
+        values = [task.pop(column, None) for column in TASK_COLUMNS]
+        values[0] = str(values[0])
+        conn.execute(
+            f"INSERT INTO tasks ({', '.join(TASK_COLUMNS)}, position, extra) "
+            f"VALUES ({', '.join('?' * len(TASK_COLUMNS))}, ?, ?)",
+            values + [position, json.dumps(task)]
+        )
+        return values[0]
+
+    def _next_position(self, conn):
+        return conn.execute("SELECT COALESCE(MAX(position), -1) + 1 FROM tasks").fetchone()[0]
+
+    def add(self, task):
+        """Inserts one task and returns its task_id."""
+        return self.add_many([task])[0]
+
+    def add_many(self, tasks):
+        """Inserts tasks in one transaction and returns their task_ids."""
+        conn = self._db()
+        with conn:
+            position = self._next_position(conn)
+            return [self._insert(conn, task, position + offset) for offset, task in enumerate(tasks)]
+
+    def get(self, task_id):
+        row = self._db().execute("SELECT * FROM tasks WHERE task_id = ?", (str(task_id),)).fetchone()
+        return _row_to_task(row) if row else None
+
+    def task_id_at(self, index):
+        """Maps a legacy list index onto a task_id, in insertion order."""
+        row = self._db().execute(
+            "SELECT task_id FROM tasks ORDER BY position LIMIT 1 OFFSET ?", (index,)
+        ).fetchone()
+        return row["task_id"] if row else None
+
+    def update(self, task_id, fields):
+        """Updates one task by primary key. Returns False if it doesn't exist."""
+        conn = self._db()
+        with conn:
+            row = conn.execute("SELECT extra FROM tasks WHERE task_id = ?", (str(task_id),)).fetchone()
+            if not row:
+                return False
+
+            fields = {k: v for k, v in fields.items() if k not in ("task_id", "position")}
+            fields.setdefault("last_touched", datetime.utcnow().isoformat())
+            columns = {k: v for k, v in fields.items() if k in TASK_COLUMNS}
+            extra = {**json.loads(row["extra"]), **{k: v for k, v in fields.items() if k not in TASK_COLUMNS}}
+
+            assignments = ", ".join(f"{column} = ?" for column in columns)
+            conn.execute(
+                f"UPDATE tasks SET {assignments}, extra = ? WHERE task_id = ?",
+                list(columns.values()) + [json.dumps(extra), str(task_id)]
+            )
+        return True
+
+    def delete_many(self, task_ids):
+        """Deletes tasks by id and returns how many were removed."""
+        task_ids = [str(task_id) for task_id in task_ids]
+        if not task_ids:
+            return 0
+        conn = self._db()
+        with conn:
+            cursor = conn.execute(
+                f"DELETE FROM tasks WHERE task_id IN ({', '.join('?' * len(task_ids))})", task_ids
+            )
+        return cursor.rowcount
+
+    def query(self, status=None, project=None, priority=None, sort_by="position", descending=False, limit=None, offset=0):
+        """Returns (tasks, total) matching the filters, sorted and paginated."""
+        if sort_by not in SORTABLE_FIELDS:
+            raise ValueError(f"Cannot sort by '{sort_by}'. Use one of: {sorted(SORTABLE_FIELDS)}.")
+
+        clauses, args = [], []
+        for column, value in (("status", status), ("project", project), ("priority", priority)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                args.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        conn = self._db()
+        total = conn.execute(f"SELECT COUNT(*) FROM tasks {where}", args).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT * FROM tasks {where} ORDER BY {sort_by} {'DESC' if descending else 'ASC'}, position "
+            f"LIMIT ? OFFSET ?",
+            args + [-1 if limit is None else limit, offset]
+        ).fetchall()
+        return [_row_to_task(row) for row in rows], total
+
+    def import_json(self, path=TASKS_FILE):
+        """One-time import of a {"tasks": [...]} JSON file. Existing task_ids are skipped."""
+        with open(path, "r") as f:
+            data = json.load(f)
+        tasks = data.get("tasks", []) if isinstance(data, dict) else data
+
+        conn = self._db()
+        imported = 0
+        with conn:
+            position = self._next_position(conn)
+            for task in tasks:
+                if "task_id" in task and conn.execute(
+                    "SELECT 1 FROM tasks WHERE task_id = ?", (str(task["task_id"]),)
+                ).fetchone():
+                    continue
+                self._insert(conn, task, position)
+                position += 1
+                imported += 1
+        return imported
+
+
+def _row_to_task(row):
+    task = {column: row[column] for column in TASK_COLUMNS}
+    task.update(json.loads(row["extra"]))
+    return task
+
+
+_store = None
+
+
+def get_store():
+    """Returns the process-wide task store, creating (and importing into) it on first use."""
+    global _store
+    if _store is None:
+        _store = TaskStore(os.getenv("ORCHESTRATE_TASKS_DB", TASKS_DB))
+    return _store
@@ -1,51 +1,60 @@
 import json
-import os
 import argparse
 
-TASKS_FILE = "tasks.json"
-
-def load_tasks():
-    """Loads tasks from tasks.json."""
-    if os.path.exists(TASKS_FILE):
-        with open(TASKS_FILE, "r") as f:
-            return json.load(f)
-    return {"tasks": []}
-
-def save_tasks(data):
-    """Saves updates to tasks.json."""
-    with open(TASKS_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+from task_store import get_store
 
 def execute_action(action, params):
     """Executes task actions."""
-    data = load_tasks()
+    store = get_store()
+    options = params.get("options", {})
     
     if action == "add_task":
-        task = {"content": params.get("input", ""), "status": "pending"}
-        data["tasks"].append(task)
-        save_tasks(data)
-        return {"status": "success", "message": "Task added successfully."}
+        task_id = store.add({"content": params.get("input", ""), "status": "pending"})
+        return {"status": "success", "message": "Task added successfully.", "task_id": task_id}
     elif action == "list_tasks":
-        return {"status": "success", "tasks": data["tasks"]}
+        try:
+            tasks, total = store.query(
+                status=options.get("status"),
+                project=options.get("project"),
+                priority=options.get("priority"),
+                sort_by=options.get("sort_by", "position"),
+                descending=options.get("descending", False),
+                limit=options.get("limit"),
+                offset=options.get("offset", 0)
+            )
+        except ValueError as e:
+            return {"status": "error", "message": str(e)}
+        return {"status": "success", "tasks": tasks, "total": total}
+    elif action == "get_task":
+        task = store.get(options.get("task_id", params.get("input", "")))
+        return {"status": "success", "task": task} if task else {"status": "error", "message": "Task not found."}
     elif action == "update_task":
-        task_index = params.get("options", {}).get("task_index")
-        new_status = params.get("options", {}).get("status", "pending")
-        if task_index is not None and 0 <= task_index < len(data["tasks"]):
-            data["tasks"][task_index]["status"] = new_status
-            save_tasks(data)
+        # task_id is preferred; task_index is kept for older callers
+        task_id = options.get("task_id")
+        if task_id is None and options.get("task_index") is not None:
+            task_id = store.task_id_at(options["task_index"]) if options["task_index"] >= 0 else None
+        fields = options.get("fields", {})
+        if "status" in options:
+            fields["status"] = options["status"]
+        elif not fields:
+            fields["status"] = "pending"
+        if task_id is not None and store.update(task_id, fields):
             return {"status": "success", "message": "Task updated successfully."}
-        return {"status": "error", "message": "Invalid task index."}
+        return {"status": "error", "message": "Invalid task_id or task index."}
     elif action == "batch_add":
-        tasks = params.get("options", {}).get("tasks", [])
-        for task in tasks:
-            data["tasks"].append({"content": task, "status": "pending"})
-        save_tasks(data)
+        tasks = options.get("tasks", [])
+        store.add_many([{"content": task, "status": "pending"} for task in tasks])
         return {"status": "success", "message": "Batch tasks added successfully."}
     elif action == "batch_delete":
-        task_indices = params.get("options", {}).get("task_indices", [])
-        data["tasks"] = [task for i, task in enumerate(data["tasks"]) if i not in task_indices]
-        save_tasks(data)
-        return {"status": "success", "message": "Batch tasks deleted successfully."}
+        task_ids = set(options.get("task_ids", []))
+        # SQLite treats a negative OFFSET as 0, which would delete the first task; skip them as update_task does
+        task_ids.update(store.task_id_at(i) for i in options.get("task_indices", []) if i >= 0)
+        task_ids.discard(None)
+        deleted = store.delete_many(task_ids)
+        return {"status": "success", "message": "Batch tasks deleted successfully.", "deleted": deleted}
+    elif action == "import_tasks":
+        imported = store.import_json(options.get("path", "orchestrate_tasks.json"))
+        return {"status": "success", "message": f"Imported {imported} tasks."}
     else:
         return {"status": "error", "message": "Invalid action or missing parameters."}
 
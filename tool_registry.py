@@ -0,0 +1,166 @@
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+
+ORCHESTRATE_TOOLS_PATH = "orchestrate_tools.json"
+LOAD_SKILLS_FILES = [
+    "orchestrate_marketplace.json",
+    "orchestrate_brain.json",
+    "orchestrate_recall.json"
+]
+# 🔥 install_tool.py touches this file after changing orchestrate_tools.json
+REGISTRY_SIGNAL_FILE = ".orchestrate_registry_signal"
+POLL_INTERVAL = 2  # Seconds between stat checks in the watcher thread
+
+
+def load_toolstack(tools_path=ORCHESTRATE_TOOLS_PATH):
+    """Loads tools ONLY from orchestrate_tools.json (for execution)."""
+    if not os.path.exists(tools_path):
+        logging.error(f"🚨 ERROR: {tools_path} not found.")
+        return {"tools": {}}
+
+    try:
+        with open(tools_path, "r") as file:
+            return json.load(file)
+    except json.JSONDecodeError:
+        logging.error(f"🚨 ERROR: Failed to parse {tools_path}.")
+        return {"tools": {}}
+
+
+def load_skills(skill_files=LOAD_SKILLS_FILES):
+    """Loads skills from marketplace, brain, and recall files."""
+    merged_skills = {"skills": {}}
+
+    for file_path in skill_files:
+        if os.path.exists(file_path):
+            try:
+                with open(file_path, "r") as file:
+                    data = json.load(file)
+                    if "skills" in data:
+                        merged_skills["skills"].update(data["skills"])
+            except json.JSONDecodeError:
+                logging.error(f"🚨 ERROR: Failed to parse {file_path}. Skipping.")
+
+    return merged_skills
+
+
+def _file_signature(path):
+    """Returns (inode, mtime, size) for a file, or None if it doesn't exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class _Snapshot:
+    """Immutable view of the registry. Replaced wholesale on reload, never mutated."""
+
+    def __init__(self, tools, skills, signatures, version):
+        self.tools = tools
+        self.skills = skills
+        self.signatures = signatures
+        self.version = version
+        self.last_reloaded = datetime.utcnow().isoformat()
+
+
+class ToolRegistry:
+    """Parsed tools and skills, loaded once and reloaded only when their files change.
+
+    Reads go through a single attribute lookup on the current snapshot, so the hot path
+    takes no locks. Reloads build a new snapshot and swap it in.
+    """
+
+    def __init__(self, tools_path=ORCHESTRATE_TOOLS_PATH, skill_files=LOAD_SKILLS_FILES,
+                 signal_file=REGISTRY_SIGNAL_FILE, poll_interval=POLL_INTERVAL):
+        self.tools_path = tools_path
+        self.skill_files = list(skill_files)
+        self.signal_file = signal_file
+        self.poll_interval = poll_interval
+        self._reload_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+        self._snapshot = None
+        self.reload()
+
+    def _signatures(self):
+        paths = [self.tools_path, self.signal_file] + self.skill_files
+        return {path: _file_signature(path) for path in paths}
+
+    def reload(self, force=True):
+        """Re-reads the registry files. With force=False, only if a file changed on disk."""
+        with self._reload_lock:
+            signatures = self._signatures()
+            current = self._snapshot
+            if not force and current and current.signatures == signatures:
+                return False
+
+            tools = load_toolstack(self.tools_path).get("tools", {})
+            skills = load_skills(self.skill_files).get("skills", {})
+            version = current.version + 1 if current else 1
+            self._snapshot = _Snapshot(tools, skills, signatures, version)
+
+        logging.info(f"✅ Tool registry v{version} loaded: {len(tools)} tools, {len(skills)} skills")
+        return True
+
+    def start_watching(self):
+        """Starts a background thread that reloads the registry when its files change."""
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.reload(force=False)
+            except Exception:
+                logging.exception("🚨 ERROR: Tool registry reload failed.")
+
+    def get_tool(self, tool_name):
+        return self._snapshot.tools.get(tool_name)
+
+    def get_skill(self, skill_name):
+        return self._snapshot.skills.get(skill_name)
+
+    @property
+    def tools(self):
+        return self._snapshot.tools
+
+    @property
+    def skills(self):
+        return self._snapshot.skills
+
+    def status(self):
+        snapshot = self._snapshot
+        return {
+            "version": snapshot.version,
+            "last_reloaded": snapshot.last_reloaded,
+            "tool_count": len(snapshot.tools),
+            "skill_count": len(snapshot.skills)
+        }
+
+
+_registry = None
+
+
+def get_registry():
+    """Returns the process-wide registry, loading it on first use."""
+    global _registry
+    if _registry is None:
+        _registry = ToolRegistry()
+    return _registry
+
+
+def signal_change(signal_file=REGISTRY_SIGNAL_FILE):
+    """Tells registries (in this and other processes) that orchestrate_tools.json changed."""
+    with open(signal_file, "a"):
+        os.utime(signal_file, None)
+    if _registry is not None:
+        _registry.reload(force=False)
@@ -0,0 +1,139 @@
+import asyncio
+import importlib.util
+import io
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+from contextlib import redirect_stderr, redirect_stdout
+
+# 🔥 Modules are imported once per script path and reused until the file changes on disk
+_loaded_modules = {}  # abs script path -> (mtime, module or None)
+_import_lock = threading.Lock()
+
+
+
+def load_tool_module(tool_name, script_path):
+    """Imports a tool script once and caches it. Returns None if the script can't be imported."""
+    abs_path = os.path.abspath(script_path)
+    try:
+        mtime = os.path.getmtime(abs_path)
+    except OSError:
+        return None
+
+    cached = _loaded_modules.get(abs_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with _import_lock:
+        cached = _loaded_modules.get(abs_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        module = None
+        try:
+            spec = importlib.util.spec_from_file_location(f"orchestrate_tool_{tool_name}", abs_path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            logging.info(f"✅ Loaded '{tool_name}' in-process from {script_path}")
+        except (Exception, SystemExit) as e:
+            logging.warning(f"⚠️ Could not import '{tool_name}' in-process ({e}). Using subprocess.")
+            module = None
+
+        _loaded_modules[abs_path] = (mtime, module)
+        return module
+
+
+def has_execute_action(tool_name, script_path):
+    """True if the tool can be called directly (and concurrently) through execute_action."""
+    module = load_tool_module(tool_name, script_path)
+    return module is not None and callable(getattr(module, "execute_action", None))
+
+
+def _call_main(module, script_path, action, params):
+    """Runs a tool's argparse main() in-process and parses the JSON it prints.
+
+    This swaps the process-wide sys.argv and stdout, so it is only safe in a process that runs
+    one call at a time (a pool worker), never on the server's executor threads.
+    """
+    stdout, stderr = io.StringIO(), io.StringIO()
+    saved_argv = sys.argv
+    sys.argv = [script_path, action, "--params", json.dumps(params)]
+    try:
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            module.main()
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            return {"error": "Script execution failed", "details": stderr.getvalue().strip()}
+    finally:
+        sys.argv = saved_argv
+
+    return json.loads(stdout.getvalue().strip())
+
+
+def run_in_process(tool_name, script_path, action, params, allow_main=False):
+    """Dispatches an action to a tool's execute_action (or, with allow_main, its main()) without spawning python3.
+
+    Returns None when the tool can't run in-process so the caller can fall back to a pool worker or subprocess.
+    """
+    module = load_tool_module(tool_name, script_path)
+    if module is None:
+        return None
+
+    try:
+        if callable(getattr(module, "execute_action", None)):
+            result = module.execute_action(action, params)
+        elif allow_main and callable(getattr(module, "main", None)):
+            result = _call_main(module, script_path, action, params)
+        elif callable(getattr(module, "main", None)):
+            return None
+        else:
+            logging.warning(f"⚠️ '{tool_name}' has no execute_action or main entry point. Using subprocess.")
+            return None
+    except (Exception, SystemExit) as e:
+        logging.exception(f"🚨 ERROR: In-process execution of '{tool_name}' failed.")
+        return {"error": "Script execution failed", "details": str(e)}
+
+    # Round-trip through JSON so callers get exactly what the subprocess path would print
+    return json.loads(json.dumps(result))
+
+
+def run_subprocess(script_path, action, params, timeout=None):
+    """Runs a tool in a fresh python3 interpreter and parses its JSON output. The child is killed after timeout seconds."""
+    try:
+        result = subprocess.run(
+            ["python3", script_path, action, "--params", json.dumps(params)],
+            capture_output=True,
+            text=True,
+            check=True,
+            timeout=timeout
+        )
+        return json.loads(result.stdout.strip())
+    except subprocess.CalledProcessError as e:
+        return {"error": "Script execution failed", "details": e.stderr.strip()}
+    except subprocess.TimeoutExpired:
+        return {"error": "Script execution timed out", "details": f"{script_path} exceeded {timeout}s."}
+
+
+async def run_subprocess_async(script_path, action, params):
+    """Like run_subprocess, but awaits the child without blocking the event loop.
+
+    Cancelling the awaiting task (timeout, client disconnect) kills the child process.
+    """
+    process = await asyncio.create_subprocess_exec(
+        "python3", script_path, action, "--params", json.dumps(params),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    try:
+        stdout, stderr = await process.communicate()
+    except asyncio.CancelledError:
+        process.kill()
+        await process.wait()
+        raise
+
+    if process.returncode != 0:
+        return {"error": "Script execution failed", "details": stderr.decode().strip()}
+    return json.loads(stdout.decode().strip())
@@ -0,0 +1,307 @@
+import json
+import logging
+import os
+import select
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+import tool_runtime
+
+WORKER_SCRIPT = os.path.abspath(__file__)
+
+# 🔥 Defaults for every pool; override per tool with a "pool" block in orchestrate_tools.json
+DEFAULT_POOL_CONFIG = {
+    "min_size": 0,           # Workers kept warm even when idle
+    "max_size": 4,           # Hard cap on concurrent workers for one tool
+    "max_requests": 500,     # Recycle a worker after this many requests
+    "idle_timeout": 300,     # Seconds an idle worker above min_size may live
+    "request_timeout": 120,  # Seconds before a request is abandoned and its worker killed
+}
+REAP_INTERVAL = 30
+
+_HEADER = struct.Struct(">I")  # 4-byte big-endian payload length
+
+
+class WorkerError(Exception):
+    """Raised when a worker dies, times out, or breaks the frame protocol."""
+
+
+# --- Framing -----------------------------------------------------------------
+
+def write_frame(stream, message):
+    """Writes one length-prefixed JSON frame."""
+    payload = json.dumps(message).encode("utf-8")
+    stream.write(_HEADER.pack(len(payload)) + payload)
+    stream.flush()
+
+
+def _read_exact(fd, size, deadline):
+    """Reads exactly size bytes from fd, raising WorkerError on EOF or deadline."""
+    chunks = []
+    while size:
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            raise WorkerError("Worker timed out.")
+        ready, _, _ = select.select([fd], [], [], remaining)
+        if not ready:
+            raise WorkerError("Worker timed out.")
+        chunk = os.read(fd, size)
+        if not chunk:
+            raise WorkerError("Worker exited unexpectedly.")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def read_frame(fd, deadline=None):
+    """Reads one length-prefixed JSON frame from a file descriptor."""
+    (length,) = _HEADER.unpack(_read_exact(fd, _HEADER.size, deadline))
+    return json.loads(_read_exact(fd, length, deadline).decode("utf-8"))
+
+
+# --- Pool --------------------------------------------------------------------
+
+class Worker:
+    """A long-lived python3 process with one tool script preloaded."""
+
+    def __init__(self, tool_name, script_path):
+        self.process = subprocess.Popen(
+            ["python3", WORKER_SCRIPT, tool_name, script_path],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE
+        )
+        self.requests_served = 0
+        self.last_used = time.monotonic()
+
+    def call(self, action, params, timeout):
+        """Sends one request and waits for its response frame."""
+        deadline = time.monotonic() + timeout if timeout else None
+        try:
+            write_frame(self.process.stdin, {"action": action, "params": params})
+        except (BrokenPipeError, OSError) as e:
+            raise WorkerError(f"Worker exited unexpectedly: {e}")
+
+        response = read_frame(self.process.stdout.fileno(), deadline)
+        self.requests_served += 1
+        self.last_used = time.monotonic()
+        return response
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def stop(self):
+        """Closes the worker's stdin so it exits, killing it if it doesn't."""
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=2)
+        except Exception:
+            self.kill()
+
+    def kill(self):
+        self.process.kill()
+        self.process.wait()
+
+
+class WorkerPool:
+    """Warm workers for one tool with size limits, recycling and idle reaping."""
+
+    def __init__(self, tool_name, script_path, config=None):
+        self.tool_name = tool_name
+        self.script_path = script_path
+        self.config = {**DEFAULT_POOL_CONFIG, **(config or {})}
+        self._idle = []
+        self._total = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _spawn(self):
+        logging.info(f"🔥 Starting worker for '{self.tool_name}'")
+        return Worker(self.tool_name, self.script_path)
+
+    def ensure_min(self):
+        """Starts workers until min_size are running."""
+        while True:
+            with self._cond:
+                if self._closed or self._total >= self.config["min_size"]:
+                    return
+                self._total += 1
+            try:
+                worker = self._spawn()
+            except Exception:
+                with self._cond:
+                    self._total -= 1
+                raise
+            with self._cond:
+                self._idle.append(worker)
+                self._cond.notify()
+
+    def _acquire(self, timeout):
+        deadline = time.monotonic() + timeout if timeout else None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise WorkerError(f"Pool for '{self.tool_name}' is closed.")
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.alive():
+                        return worker
+                    self._total -= 1
+                if self._total < self.config["max_size"]:
+                    self._total += 1
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise WorkerError(f"No free worker for '{self.tool_name}'.")
+                self._cond.wait(remaining)
+
+        try:
+            return self._spawn()
+        except Exception as e:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise WorkerError(f"Could not start worker for '{self.tool_name}': {e}")
+
+    def _release(self, worker, healthy):
+        recycle = not healthy or worker.requests_served >= self.config["max_requests"]
+        with self._cond:
+            if recycle or self._closed:
+                self._total -= 1
+            else:
+                self._idle.append(worker)
+            self._cond.notify()
+        if recycle or self._closed:
+            if healthy:
+                worker.stop()
+            else:
+                worker.kill()  # Mid-request or dead, so it can't be trusted with another frame
+
+    def execute(self, action, params, timeout=None):
+        """Runs one action on a pooled worker. Raises WorkerError if the worker fails."""
+        timeout = timeout or self.config["request_timeout"]
+        worker = self._acquire(timeout)
+        try:
+            response = worker.call(action, params, timeout)
+        except WorkerError:
+            self._release(worker, healthy=False)
+            raise
+        self._release(worker, healthy=True)
+
+        if "error" in response:
+            raise WorkerError(response["error"])
+        return response["result"]
+
+    def reap_idle(self):
+        """Stops idle workers past idle_timeout, keeping min_size alive."""
+        cutoff = time.monotonic() - self.config["idle_timeout"]
+        expired = []
+        with self._cond:
+            for worker in list(self._idle):
+                if self._total <= self.config["min_size"]:
+                    break
+                if worker.last_used < cutoff or not worker.alive():
+                    self._idle.remove(worker)
+                    self._total -= 1
+                    expired.append(worker)
+        for worker in expired:
+            worker.stop()
+
+    def shutdown(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+            self._cond.notify_all()
+        for worker in idle:
+            worker.stop()
+
+
+class PoolManager:
+    """Owns one WorkerPool per tool and a background reaper thread."""
+
+    def __init__(self, reap_interval=REAP_INTERVAL):
+        self._pools = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._reaper = threading.Thread(target=self._reap_loop, args=(reap_interval,), daemon=True)
+        self._reaper.start()
+
+    def get_pool(self, tool_name, script_path, config=None):
+        pool = self._pools.get(tool_name)
+        if pool is None or pool.script_path != script_path:
+            with self._lock:
+                pool = self._pools.get(tool_name)
+                if pool is None or pool.script_path != script_path:
+                    if pool is not None:
+                        pool.shutdown()
+                    pool = WorkerPool(tool_name, script_path, config)
+                    self._pools[tool_name] = pool
+            pool.ensure_min()
+        return pool
+
+    def execute(self, tool_name, script_path, action, params, config=None, timeout=None):
+        return self.get_pool(tool_name, script_path, config).execute(action, params, timeout)
+
+    def _reap_loop(self, interval):
+        while not self._stop.wait(interval):
+            for pool in list(self._pools.values()):
+                try:
+                    pool.reap_idle()
+                except Exception:
+                    logging.exception(f"🚨 ERROR: Reaping workers for '{pool.tool_name}' failed.")
+
+    def shutdown(self):
+        self._stop.set()
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.shutdown()
+
+
+_manager = None
+
+
+def get_manager(create=True):
+    """Returns the process-wide PoolManager, or None if none exists and create is False."""
+    global _manager
+    if _manager is None and create:
+        _manager = PoolManager()
+    return _manager
+
+
+# --- Worker process ------------------------------------------------------------
+
+def serve(tool_name, script_path):
+    """Worker loop: preload the tool, then answer framed requests on stdin/stdout."""
+    # Keep the real stdout for frames and point fd 1 at stderr so stray prints can't corrupt them
+    protocol_out = os.fdopen(os.dup(1), "wb")
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+    protocol_in = sys.stdin.buffer.fileno()
+
+    tool_runtime.load_tool_module(tool_name, script_path)
+
+    while True:
+        try:
+            request = read_frame(protocol_in)
+        except WorkerError:
+            return  # Pool closed our stdin
+
+        try:
+            # A worker handles one request at a time, so main()-style tools can run here directly
+            result = tool_runtime.run_in_process(
+                tool_name, script_path, request["action"], request["params"], allow_main=True
+            )
+            if result is None:
+                result = tool_runtime.run_subprocess(script_path, request["action"], request["params"])
+            write_frame(protocol_out, {"result": result})
+        except Exception as e:
+            write_frame(protocol_out, {"error": f"Script execution failed: {e}"})
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    serve(sys.argv[1], sys.argv[2])
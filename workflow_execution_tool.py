@@ -1,7 +1,16 @@
 import json
 import os
+import re
 import argparse
-import subprocess
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import result_cache
+import tool_registry
+import tool_runtime
+import worker_pool
+
+MAX_PARALLEL_STEPS = 8  # Default cap on concurrently running steps in a DAG workflow
+STEP_REFERENCE = re.compile(r"\{steps\.([A-Za-z0-9_\-]+)\}")
 
 def load_workflow(workflow_name):
     """Loads the workflow definition from orchestrate_workflows.json."""
@@ -14,13 +23,26 @@ def load_workflow(workflow_name):
     
     return workflows.get("workflows", {}).get(workflow_name, {"status": "error", "message": "Workflow not found."})
 
-def execute_step(step, previous_output):
-    """Executes a single step in the workflow, safely replacing placeholders."""
+def to_placeholder_str(output):
+    """Renders a step output the way it is substituted into later step params."""
+    return json.dumps(output) if isinstance(output, (dict, list)) else str(output)
+
+def execute_step(step, previous_output, step_outputs=None):
+    """Executes a single step in the workflow, safely replacing placeholders.
+
+    {input}/{previous_output} become the previous output; {steps.<id>} becomes the output
+    of the earlier step with that id.
+    """
     tool = step.get("tool")
     action = step.get("action")
     params = step.get("params", {})
+    step_outputs = step_outputs or {}
     
-    previous_output_str = json.dumps(previous_output) if isinstance(previous_output, (dict, list)) else str(previous_output)
+    previous_output_str = to_placeholder_str(previous_output)
+    
+    def replace_reference(match):
+        step_id = match.group(1)
+        return to_placeholder_str(step_outputs[step_id]) if step_id in step_outputs else match.group(0)
     
     def replace_placeholders(obj):
         if isinstance(obj, dict):
@@ -28,7 +50,8 @@ def execute_step(step, previous_output):
         elif isinstance(obj, list):
             return [replace_placeholders(v) for v in obj]
         elif isinstance(obj, str):
-            return obj.replace("{input}", previous_output_str).replace("{previous_output}", previous_output_str)
+            obj = obj.replace("{input}", previous_output_str).replace("{previous_output}", previous_output_str)
+            return STEP_REFERENCE.sub(replace_reference, obj)
         return obj
     
     params = replace_placeholders(params)
@@ -39,13 +62,145 @@ def execute_step(step, previous_output):
     if not tool or not action:
         return {"status": "error", "message": "Invalid step definition."}
     
-    command = ["python3", tool + ".py", action, "--params", json.dumps(params)]
-    result = subprocess.run(command, capture_output=True, text=True)
-    
-    if result.returncode == 0:
-        return json.loads(result.stdout)
+    # Steps can opt out of result caching with "cache": false
+    if step.get("cache", True):
+        tool_config = tool_registry.get_registry().get_tool(tool)
+        return result_cache.cached_call(tool, action, params, lambda: run_tool(tool, action, params), tool_config)
+    return run_tool(tool, action, params)
+
+def run_tool(tool, action, params):
+    """Runs one tool action the way the server would, keeping tools warm across steps.
+
+    Tools with execute_action are called directly in this process. Others go to warm pool
+    workers (the server's when running in-process there, otherwise this process's own pool),
+    so a step never pays for a fresh interpreter. Only "execution": "subprocess" tools spawn one.
+    """
+    tool_config = tool_registry.get_registry().get_tool(tool)
+    if tool_config is None:
+        return {"status": "error", "message": f"Tool '{tool}' not found."}
+    script_path = tool_config.get("path")
+    if not script_path or not os.path.isfile(script_path):
+        return {"status": "error", "message": f"Script for '{tool}' not found."}
+
+    mode = tool_config.get("execution", "in_process")
+    timeout = tool_config.get("timeout")
+    if mode == "in_process" and tool_runtime.has_execute_action(tool, script_path):
+        result = tool_runtime.run_in_process(tool, script_path, action, params)
+    elif mode == "subprocess":
+        result = tool_runtime.run_subprocess(script_path, action, params, timeout=timeout)
     else:
-        return {"status": "error", "message": result.stderr}
+        try:
+            result = worker_pool.get_manager().execute(
+                tool, script_path, action, params, config=tool_config.get("pool"), timeout=timeout
+            )
+        except worker_pool.WorkerError as e:
+            return {"status": "error", "message": str(e)}
+
+    if isinstance(result, dict) and "error" in result and "status" not in result:
+        return {"status": "error", "message": result.get("details") or result["error"]}
+    return result
+
+def is_step_error(result):
+    return isinstance(result, dict) and result.get("status") == "error"
+
+def find_step_references(obj):
+    """Returns the step ids referenced through {steps.<id>} anywhere in a step's params."""
+    if isinstance(obj, dict):
+        return set().union(*(find_step_references(v) for v in obj.values())) if obj else set()
+    if isinstance(obj, list):
+        return set().union(*(find_step_references(v) for v in obj)) if obj else set()
+    if isinstance(obj, str):
+        return set(STEP_REFERENCE.findall(obj))
+    return set()
+
+def is_dag_workflow(steps):
+    return any("depends_on" in step for step in steps)
+
+def build_step_graph(steps):
+    """Maps step id -> (step, dependency ids). Steps without an id get step_<index>.
+
+    {steps.<id>} references count as dependencies. Raises ValueError on duplicate ids,
+    unknown dependencies or cycles.
+    """
+    graph = {}
+    for index, step in enumerate(steps):
+        step_id = str(step.get("id", f"step_{index}"))
+        if step_id in graph:
+            raise ValueError(f"Duplicate step id '{step_id}'.")
+        depends_on = step.get("depends_on", [])
+        if isinstance(depends_on, str):
+            depends_on = [depends_on]
+        deps = set(map(str, depends_on)) | find_step_references(step.get("params", {}))
+        graph[step_id] = (step, deps)
+
+    for step_id, (_, deps) in graph.items():
+        unknown = deps - graph.keys()
+        if unknown:
+            raise ValueError(f"Step '{step_id}' depends on unknown step(s): {sorted(unknown)}.")
+
+    # Kahn's algorithm to reject cycles up front
+    remaining = {step_id: set(deps) for step_id, (_, deps) in graph.items()}
+    while remaining:
+        ready = [step_id for step_id, deps in remaining.items() if not deps]
+        if not ready:
+            raise ValueError(f"Workflow has a dependency cycle among: {sorted(remaining)}.")
+        for step_id in ready:
+            del remaining[step_id]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+    return graph
+
+def execute_dag(steps, workflow_input, max_parallel=MAX_PARALLEL_STEPS, output_step=None):
+    """Runs steps as soon as their dependencies finish, with independent branches in parallel."""
+    try:
+        graph = build_step_graph(steps)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+
+    outputs = {}
+    waiting = {step_id: set(deps) for step_id, (_, deps) in graph.items()}
+    running = {}
+
+    def previous_output_for(deps):
+        # One dependency passes its output straight through; several are keyed by step id
+        if not deps:
+            return workflow_input
+        if len(deps) == 1:
+            return outputs[next(iter(deps))]
+        return {dep: outputs[dep] for dep in sorted(deps)}
+
+    with ThreadPoolExecutor(max_workers=max_parallel) as pool:
+        while waiting or running:
+            for step_id in [step_id for step_id, deps in waiting.items() if not deps]:
+                step, deps = graph[step_id]
+                del waiting[step_id]
+                running[pool.submit(execute_step, step, previous_output_for(deps), dict(outputs))] = step_id
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step_id = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"status": "error", "message": str(e)}
+
+                if is_step_error(result):
+                    for pending in running:
+                        pending.cancel()
+                    return {**result, "failed_step": step_id}
+
+                outputs[step_id] = result
+                for deps in waiting.values():
+                    deps.discard(step_id)
+
+    if output_step:
+        return outputs.get(output_step, {"status": "error", "message": f"Output step '{output_step}' not found."})
+
+    # Steps nothing depends on are the workflow's results
+    depended_on = set().union(*(deps for _, deps in graph.values()))
+    sinks = [step_id for step_id in graph if step_id not in depended_on]
+    return outputs[sinks[0]] if len(sinks) == 1 else {step_id: outputs[step_id] for step_id in sinks}
 
 def execute_workflow(params):
     """Executes a full workflow from orchestrate_workflows.json."""
@@ -60,12 +215,24 @@ def execute_workflow(params):
     if "status" in workflow and workflow["status"] == "error":
         return workflow
     
+    steps = workflow.get("steps", [])
+    if is_dag_workflow(steps):
+        return execute_dag(
+            steps,
+            workflow_input,
+            max_parallel=workflow.get("max_parallel", MAX_PARALLEL_STEPS),
+            output_step=workflow.get("output")
+        )
+    
     output = workflow_input
-    for step in workflow.get("steps", []):
-        step_result = execute_step(step, output)
-        if step_result.get("status") == "error":
+    step_outputs = {}
+    for step in steps:
+        step_result = execute_step(step, output, step_outputs)
+        if is_step_error(step_result):
             return step_result
         output = step_result
+        if "id" in step:
+            step_outputs[str(step["id"])] = step_result
     
     return output
 